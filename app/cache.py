@@ -0,0 +1,114 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+from app.config import BACKTEST_RESULTS_CACHE_TTL, PRINCIPAL_CACHE_TTL, INDICATOR_CACHE_SIZE, INDICATOR_CACHE_MAX_BYTES
+
+
+class ResponseCache:
+    """
+    In-process LRU cache with an optional TTL. Bounded by entry count and, when given a
+    `sizeof` function, by the total size of the values (the newest entry always stays).
+
+    Readers that fill the cache after a miss should pass the `version` they saw before
+    querying to `set()`; if the key was invalidated in the meantime the value is dropped,
+    so a slow query can never re-populate the cache with data older than the invalidation.
+    Invalidating one key leaves in-flight fills of other keys alone.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float | None = None,
+        max_bytes: int | None = None,
+        sizeof: Callable[[Any], int] | None = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self._entries: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+        self._sizes: dict[Hashable, int] = {}
+        # Every invalidation advances the clock; keys map to the clock of their last one
+        self._clock = 0
+        self._invalidated: dict[Hashable, int] = {}
+        self._invalidated_all = 0
+
+    @property
+    def version(self) -> int:
+        return self._clock
+
+    def _stale(self, key: Hashable, version: int) -> bool:
+        return max(self._invalidated_all, self._invalidated.get(key, 0)) > version
+
+    def _advance(self) -> int:
+        self._clock += 1
+        if len(self._invalidated) > 4 * self.max_entries:
+            # Forget per-key history by treating everything as invalidated now
+            self._invalidated.clear()
+            self._invalidated_all = self._clock
+        return self._clock
+
+    def _remove(self, key: Hashable):
+        self._entries.pop(key, None)
+        self.nbytes -= self._sizes.pop(key, 0)
+
+    def get(self, key: Hashable) -> Any | None:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None, version: int | None = None):
+        if version is not None and self._stale(key, version):
+            return
+        ttl = ttl if ttl is not None else self.ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._remove(key)
+        self._entries[key] = (expires_at, value)
+        if self.sizeof is not None:
+            self._sizes[key] = self.sizeof(value)
+            self.nbytes += self._sizes[key]
+        while len(self._entries) > self.max_entries or (
+            self.max_bytes is not None and self.nbytes > self.max_bytes and len(self._entries) > 1
+        ):
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, key: Hashable):
+        self._invalidated[key] = self._advance()
+        self._remove(key)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]):
+        # The predicate cannot be tested against keys still being filled, so those all go stale
+        self._invalidated_all = self._advance()
+        for key in [k for k in self._entries if predicate(k)]:
+            self._remove(key)
+
+    def clear(self):
+        self._invalidated_all = self._advance()
+        self._entries.clear()
+        self._sizes.clear()
+        self.nbytes = 0
+
+
+# Keyed by (ticker, timeframe, trading_date). Closed trading days never change and are kept
+# until evicted; the current day is stored with a short TTL and invalidated by
+# DatabaseManager.upsert_candles.
+intraday_cache = ResponseCache(max_entries=512)
+
+# Keyed by (strategy, ticker, timeframe); invalidated by DatabaseManager.save_backtest_results.
+# The TTL bounds staleness when another worker process saved the results.
+backtest_results_cache = ResponseCache(max_entries=256, ttl=BACKTEST_RESULTS_CACHE_TTL)
+
+# Authenticated users keyed by token subject (username); invalidated by DatabaseManager on user changes.
+principal_cache = ResponseCache(max_entries=1024, ttl=PRINCIPAL_CACHE_TTL)
+
+# IndicatorSeries keyed by (ticker, timeframe, indicator spec); extended in place as new bars arrive.
+indicator_cache = ResponseCache(
+    max_entries=INDICATOR_CACHE_SIZE, max_bytes=INDICATOR_CACHE_MAX_BYTES, sizeof=lambda series: series.nbytes
+)
@@ -6,7 +6,30 @@ load_dotenv()
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # points to project-root
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", 1))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", 10))
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", 30000))  # server-side, 0 disables
+DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", 60))  # client-side, seconds
 CSV_PATH = os.path.join(BASE_DIR, "data", "tiingo_xauusd_5min.csv")
+BACKTEST_RESULTS_CACHE_TTL = float(os.getenv("BACKTEST_RESULTS_CACHE_TTL", 300))  # seconds
+INTRADAY_CURRENT_DAY_TTL = float(os.getenv("INTRADAY_CURRENT_DAY_TTL", 60))  # seconds
+INTRADAY_CLOSE_GRACE_MINUTES = int(os.getenv("INTRADAY_CLOSE_GRACE_MINUTES", 30))  # before a day counts as closed
+# Serve large list responses through orjson, bypassing response_model validation
+FAST_JSON_RESPONSES = os.getenv("FAST_JSON_RESPONSES", "false").lower() in ("1", "true", "yes")
+STREAM_CLIENT_QUEUE_SIZE = int(os.getenv("STREAM_CLIENT_QUEUE_SIZE", 100))  # pending messages per client
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", 15))
+STREAM_NOTIFY_CHANNEL = os.getenv("STREAM_NOTIFY_CHANNEL", "martlet_candles")  # Postgres channel relaying updates across workers
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", 30))  # seconds
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", 2))  # concurrent Argon2 hashes
+CANDLE_CACHE_DIR = os.getenv("CANDLE_CACHE_DIR", os.path.join(BASE_DIR, "data", "candles"))
+SCHEDULER_LOCK_NAME = os.getenv("SCHEDULER_LOCK_NAME", "martlet:scheduler")  # advisory lock held by the scheduling worker
+LEADER_POLL_SECONDS = float(os.getenv("LEADER_POLL_SECONDS", 10))  # lock acquisition / keep-alive interval
+INDICATOR_CACHE_SIZE = int(os.getenv("INDICATOR_CACHE_SIZE", 64))  # cached (ticker, timeframe, indicator) series
+INDICATOR_CACHE_MAX_BYTES = int(os.getenv("INDICATOR_CACHE_MAX_BYTES", 256 * 1024 * 1024))  # total size of cached series
+CANDLE_STORE_MAX_BYTES = int(os.getenv("CANDLE_STORE_MAX_BYTES", 512 * 1024 * 1024))  # in-memory candle histories
+CANDLE_STORE_PRICE_DTYPE = os.getenv("CANDLE_STORE_PRICE_DTYPE", "float64")  # float32 halves memory at ~7 significant digits
+CANDLE_STORE_PRELOAD = os.getenv("CANDLE_STORE_PRELOAD", "xauusd:5min")  # ticker:timeframe pairs loaded at startup
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(BASE_DIR, "data", "profiles"))  # on-demand request profiles
 
 DATE_FORMAT = '%Y-%m-%d'
 TIME_FORMAT = '%H:%M:%S'
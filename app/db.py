@@ -1,10 +1,112 @@
+import time
 import asyncpg
+from contextlib import asynccontextmanager
 from loguru import logger
 from typing import Optional
 from datetime import datetime, date
 import pandas as pd
-from app.config import DATABASE_URL
+from app.config import (
+    DATABASE_URL, DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_STATEMENT_TIMEOUT_MS, DB_COMMAND_TIMEOUT
+)
 from app.schemas.trade import TradeCreate
+from app.cache import backtest_results_cache, intraday_cache, principal_cache
+from app.services.metrics import observe_query, DB_POOL_WAITERS, DB_POOL_WAIT
+
+CANDLE_COLUMNS = [
+    "ticker", "timeframe", "timestamp", "open", "high", "low", "close",
+    "trading_date", "ema20", "prev_day_high", "prev_day_low", "prev2_day_high", "prev2_day_low"
+]
+
+LAST_CANDLE_TIMESTAMP_SQL = """
+    SELECT MAX(timestamp) as last_timestamp FROM market_snapshot WHERE ticker = $1 and timeframe = $2
+"""
+
+RECENT_CANDLES_SQL = f"""
+    SELECT {', '.join(CANDLE_COLUMNS)}
+    FROM market_snapshot
+    WHERE ticker = $1 AND timeframe = $2
+    ORDER BY timestamp DESC
+    LIMIT $3
+"""
+
+CANDLES_SINCE_SQL = f"""
+    SELECT {', '.join(CANDLE_COLUMNS)}
+    FROM market_snapshot
+    WHERE ticker = $1 AND timeframe = $2 AND timestamp >= $3
+    ORDER BY timestamp ASC
+"""
+
+INTRADAY_COLUMNS = [
+    "timestamp", "ticker", "timeframe", "open", "high", "low", "close",
+    "trading_date", "ema20", "prev_day_high", "prev_day_low"
+]
+
+INTRADAY_CANDLES_SQL = f"""
+    SELECT {', '.join(INTRADAY_COLUMNS)}
+    FROM market_snapshot
+    WHERE ticker = $1 AND timeframe = $2 AND trading_date = $3
+    ORDER BY timestamp ASC
+"""
+
+BACKTEST_RESULTS_SQL = """
+    SELECT trading_date, equity, pnl
+    FROM backtest_results
+    WHERE strategy = $1 AND ticker = $2 AND timeframe = $3
+    ORDER BY trading_date DESC
+    LIMIT $4
+"""
+
+TRADE_IMPORT_COLUMNS = [
+    "source_row", "ticker", "direction", "entry_price", "exit_price", "size", "type",
+    "entry_time", "exit_time", "trading_date", "notes", "stop_price"
+]
+
+# An imported trade `i` duplicates an existing one when the same fill is already journaled
+TRADE_IMPORT_DEDUPE_SQL = """
+    EXISTS (
+        SELECT 1 FROM trades t
+        WHERE t.ticker = i.ticker
+          AND t.entry_time = i.entry_time
+          AND t.type = i.type
+          AND t.direction = i.direction
+          AND t.entry_price = i.entry_price::numeric(12, 5)
+          AND t.size = i.size
+    )
+"""
+
+# GROUP BY expressions over trade_daily_summary, keyed by /analytics/trades group_by
+TRADE_ANALYTICS_GROUPS = {
+    "day": ("trading_date", "period"),
+    "week": ("date_trunc('week', trading_date)::date", "period"),
+    "ticker": ("ticker", "ticker"),
+}
+
+
+def _trade_type_aggregates(trade_type: str, prefix: str) -> str:
+    """Per-type aggregate columns of the trade analytics query"""
+    where = f"FILTER (WHERE type = '{trade_type}')"
+    return f"""
+        COALESCE(SUM(trades) {where}, 0) AS {prefix}_trades,
+        SUM(wins) {where}::float8 / NULLIF(SUM(trades) {where}, 0) AS {prefix}_win_rate,
+        COALESCE(SUM(pnl) {where}, 0) AS {prefix}_pnl,
+        SUM(pnl_points) {where} / NULLIF(SUM(trades) {where}, 0) AS {prefix}_avg_points,
+        SUM(r_sum) {where} / NULLIF(SUM(r_count) {where}, 0) AS {prefix}_avg_r"""
+
+
+USER_BY_USERNAME_SQL = """
+    SELECT id, username, email, hashed_password, is_active, created_at FROM users WHERE username = $1
+"""
+
+# Statements run on (nearly) every request. Each new pool connection runs them once with
+# arguments that match no rows, so they land in asyncpg's per-connection statement cache
+# before the first real request and later calls skip the parse / type introspection round trips.
+HOT_STATEMENTS = [
+    (LAST_CANDLE_TIMESTAMP_SQL, ("", "")),
+    (RECENT_CANDLES_SQL, ("", "", 0)),
+    (INTRADAY_CANDLES_SQL, ("", "", date.min)),
+    (BACKTEST_RESULTS_SQL, ("", "", "", 0)),
+    (USER_BY_USERNAME_SQL, ("",)),
+]
 
 
 class DatabaseManager:
@@ -16,10 +118,32 @@ class DatabaseManager:
         if self._pool is None:
             self._pool = await asyncpg.create_pool(
                 DATABASE_URL,
-                min_size=1,
-                max_size=10
+                min_size=DB_POOL_MIN_SIZE,
+                max_size=DB_POOL_MAX_SIZE,
+                command_timeout=DB_COMMAND_TIMEOUT,
+                server_settings={"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)},
+                init=self._init_connection,
             )
             logger.info("✅ DB pool initialized")
+
+    @staticmethod
+    async def _init_connection(conn: asyncpg.Connection):
+        """Per-connection setup, run once when the pool opens a new connection"""
+        # Decode NUMERIC / DECIMAL columns straight to float instead of decimal.Decimal,
+        # so DataFrames built from query results get float64 columns.
+        await conn.set_type_codec(
+            "numeric",
+            encoder=str,
+            decoder=float,
+            schema="pg_catalog",
+            format="text",
+        )
+        for query, args in HOT_STATEMENTS:
+            try:
+                await conn.fetch(query, *args)
+            except asyncpg.PostgresError as e:
+                # e.g. a table whose migration has not run yet; the statement is prepared on first use
+                logger.warning(f"⚠️ Could not warm statement ({e.__class__.__name__}: {e}): {' '.join(query.split())[:80]}")
     
     async def disconnect(self):
         """Close database connection pool"""
@@ -34,9 +158,26 @@ class DatabaseManager:
         if self._pool is None:
             raise RuntimeError("Database not connected. Call connect() first.")
         return self._pool
+
+    @asynccontextmanager
+    async def acquire(self):
+        """Acquire a pool connection, recording how long callers wait for one"""
+        pool = self.pool
+        DB_POOL_WAITERS.inc()
+        start = time.perf_counter()
+        try:
+            conn = await pool.acquire()
+        finally:
+            DB_POOL_WAITERS.dec()
+            DB_POOL_WAIT.observe(time.perf_counter() - start)
+        try:
+            yield conn
+        finally:
+            await pool.release(conn)
     
+    @observe_query
     async def fetch_market_snapshot_by_ticker_by_timeframe(self, ticker: str, timeframe: str, limit: int | None = None):
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             if limit is not None:
                 rows = await conn.fetch(
                     "SELECT * FROM market_snapshot WHERE ticker = $1 AND timeframe = $2 ORDER BY timestamp LIMIT $3",
@@ -49,32 +190,20 @@ class DatabaseManager:
                 )
             return [dict(row) for row in rows]
     
+    @observe_query
     async def get_last_candle_timestamp(self, ticker: str, timeframe: str) -> datetime | None:
         """Get the most recent candle timestamp from database"""
-        async with self.pool.acquire() as conn:
-            result = await conn.fetchrow(
-                "SELECT MAX(timestamp) as last_timestamp FROM market_snapshot WHERE ticker = $1 and timeframe = $2",
-                ticker, timeframe
-            )
+        async with self.acquire() as conn:
+            result = await conn.fetchrow(LAST_CANDLE_TIMESTAMP_SQL, ticker, timeframe)
             return result['last_timestamp'] if result and result['last_timestamp'] else None
     
+    @observe_query
     async def get_recent_candles(self, ticker: str, timeframe: str, limit: int = 1000):
-        cols = [
-            "ticker", "timeframe", "timestamp", "open", "high", "low", "close",
-            "trading_date", "ema20", "prev_day_high", "prev_day_low", "prev2_day_high", "prev2_day_low"
-        ]
-        async with self.pool.acquire() as conn:
-            query = f"""
-            SELECT {', '.join(cols)}
-            FROM market_snapshot
-            WHERE ticker = $1 AND timeframe = $2
-            ORDER BY timestamp DESC
-            LIMIT {limit}
-            """
-            rows = await conn.fetch(query, ticker, timeframe)
+        async with self.acquire() as conn:
+            rows = await conn.fetch(RECENT_CANDLES_SQL, ticker, timeframe, limit)
 
             if not rows:
-                return pd.DataFrame(columns=cols)
+                return pd.DataFrame(columns=CANDLE_COLUMNS)
 
             # reverse to chronological order
             rows = list(reversed(rows))
@@ -84,13 +213,67 @@ class DatabaseManager:
             return df.reset_index(drop=True)
             # return [dict(r) for r in reversed(rows)]
     
+    @observe_query
+    async def fetch_candles_since(self, ticker: str, timeframe: str, since: datetime) -> list[dict]:
+        """Candles at or after `since`, oldest first"""
+        async with self.acquire() as conn:
+            rows = await conn.fetch(CANDLES_SINCE_SQL, ticker, timeframe, since)
+            return [dict(r) for r in rows]
+
+    @observe_query
+    async def notify(self, channel: str, payload: str):
+        async with self.acquire() as conn:
+            await conn.execute("SELECT pg_notify($1, $2)", channel, payload)
+
+    @observe_query
+    async def fetch_intraday_candles(self, ticker: str, timeframe: str, trading_date: date):
+        async with self.acquire() as conn:
+            return await conn.fetch(INTRADAY_CANDLES_SQL, ticker, timeframe, trading_date)
+
+    @observe_query
+    async def fetch_candle_buckets(
+        self,
+        ticker: str,
+        timeframe: str,
+        start: datetime,
+        end: datetime,
+        bucket_seconds: int,
+        origin: datetime
+    ):
+        """Aggregate candles in [start, end) into OHLC buckets of bucket_seconds each, aligned to origin"""
+        async with self.acquire() as conn:
+            return await conn.fetch(
+                """
+                SELECT
+                    date_bin(make_interval(secs => $5), timestamp, $6) AS timestamp,
+                    (array_agg(open ORDER BY timestamp ASC))[1] AS open,
+                    MAX(high) AS high,
+                    MIN(low) AS low,
+                    (array_agg(close ORDER BY timestamp DESC))[1] AS close,
+                    COUNT(*) AS bars
+                FROM market_snapshot
+                WHERE ticker = $1 AND timeframe = $2 AND timestamp >= $3 AND timestamp < $4
+                GROUP BY 1
+                ORDER BY 1
+                """,
+                ticker, timeframe, start, end, bucket_seconds, origin
+            )
+
+    async def ensure_market_snapshot_partitions(self, conn, start: datetime, end: datetime) -> int:
+        """Create any missing monthly market_snapshot partitions covering [start, end]"""
+        created = await conn.fetchval("SELECT ensure_market_snapshot_partitions($1, $2)", start, end)
+        if created:
+            logger.info(f"✅ Created {created} market_snapshot partition(s) for {start} → {end}")
+        return created
+
+    @observe_query
     async def upsert_candles(self, ticker: str, timeframe: str, candles_data: list):
         if not candles_data:
             logger.warning(f"No candles data provided for {ticker} {timeframe}")
             return
         
         try:
-            async with self.pool.acquire() as conn:
+            async with self.acquire() as conn:
                 async with conn.transaction():
 
                     rows = []
@@ -108,6 +291,9 @@ class DatabaseManager:
                         prev2_day_low = candle.get("prev2_day_low")
 
                         rows.append((ticker, ts, timeframe, o, h, l, c, trading_date, ema20, prev_day_high, prev_day_low, prev2_day_high, prev2_day_low))
+
+                    timestamps = [r[1] for r in rows]
+                    await self.ensure_market_snapshot_partitions(conn, min(timestamps), max(timestamps))
                     
                     await conn.executemany("""
                         INSERT INTO market_snapshot
@@ -129,26 +315,30 @@ class DatabaseManager:
                     """, rows)
                     
                     logger.info(f"✅ Upserted {len(candles_data)} candles for {ticker} {timeframe}")
+
+            for trading_date in {r[7] for r in rows}:
+                intraday_cache.invalidate((ticker, timeframe, trading_date))
                     
         except Exception as e:
             logger.error(f"❌ Failed to upsert candles for {ticker} {timeframe}: {e}")
             raise
     
+    @observe_query
     async def create_trade(self, trade_data: TradeCreate):
         """Insert a new trade and return the inserted row"""
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             row = await conn.fetchrow(
                 """
                 INSERT INTO trades (
                     ticker, direction, size, type, entry_price, exit_price,
-                    entry_time, exit_time, trading_date, notes, created_at
+                    entry_time, exit_time, trading_date, notes, stop_price, created_at
                 )
                 VALUES (
                     LOWER($1), $2, $3, $4, $5,
-                    $6, $7, $8, $9, $10, NOW()
+                    $6, $7, $8, $9, $10, $11, NOW()
                 )
                 RETURNING id, ticker, direction, size, type, entry_price, exit_price,
-                          entry_time, exit_time, trading_date, notes, created_at
+                          entry_time, exit_time, trading_date, stop_price, notes, created_at
                 """,
                 trade_data.ticker,
                 trade_data.direction,
@@ -160,25 +350,122 @@ class DatabaseManager:
                 trade_data.exit_time,
                 trade_data.trading_date,
                 trade_data.notes,
+                trade_data.stop_price,
             )
             return dict(row)
     
-    async def list_trades(self, limit: int = 100):
-        """Fetch recent trades, ordered by created_at descending"""
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(
-                """
-                SELECT * FROM trades
-                ORDER BY created_at DESC
-                LIMIT $1
-                """,
-                limit
-            )
+    @observe_query
+    async def import_trades(self, records: list[tuple]) -> tuple[int, list[int]]:
+        """
+        Bulk insert validated trades (see trade_import_utils.validate_trades) with one COPY
+        into a staging table and a single merge. Trades that already exist, matched on
+        TRADE_IMPORT_DEDUPE_SQL, are skipped. Returns the number of inserted trades and the
+        source rows of the skipped ones.
+        """
+        async with self.acquire() as conn:
+            async with conn.transaction():
+                # Serializes concurrent imports, so the same file uploaded twice cannot race past the dedupe
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext('import_trades'))")
+                await conn.execute("""
+                    CREATE TEMP TABLE trades_import (
+                        source_row INTEGER NOT NULL,
+                        ticker TEXT NOT NULL,
+                        direction TEXT NOT NULL,
+                        entry_price DOUBLE PRECISION NOT NULL,
+                        exit_price DOUBLE PRECISION NOT NULL,
+                        size DOUBLE PRECISION NOT NULL,
+                        type TEXT NOT NULL,
+                        entry_time TIMESTAMPTZ NOT NULL,
+                        exit_time TIMESTAMPTZ NOT NULL,
+                        trading_date DATE NOT NULL,
+                        notes TEXT,
+                        stop_price DOUBLE PRECISION
+                    ) ON COMMIT DROP
+                """)
+                await conn.copy_records_to_table("trades_import", records=records, columns=TRADE_IMPORT_COLUMNS)
+
+                duplicates = await conn.fetch(f"""
+                    SELECT source_row FROM trades_import i
+                    WHERE {TRADE_IMPORT_DEDUPE_SQL}
+                    ORDER BY source_row
+                """)
+                imported = await conn.fetchval(f"""
+                    WITH inserted AS (
+                        INSERT INTO trades (
+                            ticker, direction, size, type, entry_price, exit_price,
+                            entry_time, exit_time, trading_date, notes, stop_price, created_at
+                        )
+                        SELECT
+                            ticker, direction, size, type, entry_price::numeric(12, 5), exit_price::numeric(12, 5),
+                            entry_time, exit_time, trading_date, notes, stop_price::numeric(12, 5), NOW()
+                        FROM trades_import i
+                        WHERE NOT {TRADE_IMPORT_DEDUPE_SQL}
+                        ORDER BY source_row
+                        RETURNING 1
+                    )
+                    SELECT COUNT(*) FROM inserted
+                """)
+        return imported, [r["source_row"] for r in duplicates]
+
+    @observe_query
+    async def list_trades(
+        self,
+        limit: int = 100,
+        after: tuple[date, datetime, int] | None = None,
+        ticker: str | None = None,
+        trade_type: str | None = None,
+        direction: str | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ):
+        """
+        Fetch trades ordered by (created_at, id) descending, one keyset page at a time.
+        With a trading_date range the order is (trading_date, created_at, id) descending,
+        so the range and the keyset are one index scan. `after` is the
+        (trading_date, created_at, id) of the last trade on the previous page.
+        """
+        conditions, params = [], []
+
+        def param(value) -> str:
+            params.append(value)
+            return f"${len(params)}"
+
+        if ticker is not None:
+            conditions.append(f"ticker = LOWER({param(ticker)})")
+        if trade_type is not None:
+            conditions.append(f"type = {param(trade_type)}")
+        if direction is not None:
+            conditions.append(f"direction = {param(direction)}")
+        if start_date is not None:
+            conditions.append(f"trading_date >= {param(start_date)}")
+        if end_date is not None:
+            conditions.append(f"trading_date <= {param(end_date)}")
+        by_date = start_date is not None or end_date is not None
+        if after is not None:
+            trading_date, created_at, trade_id = after
+            if by_date:
+                conditions.append(
+                    f"(trading_date, created_at, id) < ({param(trading_date)}, {param(created_at)}, {param(trade_id)})"
+                )
+            else:
+                conditions.append(f"(created_at, id) < ({param(created_at)}, {param(trade_id)})")
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        order = "trading_date DESC, created_at DESC, id DESC" if by_date else "created_at DESC, id DESC"
+        query = f"""
+            SELECT * FROM trades
+            {where}
+            ORDER BY {order}
+            LIMIT {param(limit)}
+        """
+        async with self.acquire() as conn:
+            rows = await conn.fetch(query, *params)
             return [dict(row) for row in rows]
     
+    @observe_query
     async def delete_trade(self, trade_id: int) -> bool:
         """Delete a trade by ID. Returns True if deleted, False if not found."""
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             result = await conn.execute(
                 "DELETE FROM trades WHERE id = $1",
                 trade_id
@@ -186,19 +473,66 @@ class DatabaseManager:
             deleted_count = int(result.split(" ")[1])
             return deleted_count > 0
     
+    @observe_query
     async def fetch_trades_by_ticker_date_type(self, ticker: str, trading_date: date, trade_type: str):
         query = """
-            SELECT id, direction, entry_price, exit_price, entry_time, exit_time, size, type, notes
+            SELECT id, direction, entry_price, exit_price, stop_price, entry_time, exit_time, size, type, notes
             FROM trades
             WHERE ticker = $1
             AND trading_date = $2
             AND type = $3
             ORDER BY entry_time ASC
         """
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             rows = await conn.fetch(query, ticker, trading_date, trade_type)
             return [dict(r) for r in rows]
             
+    @observe_query
+    async def fetch_trade_analytics(
+        self,
+        group_by: str,
+        ticker: str | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ):
+        """
+        Real vs simulated trade performance grouped by day, week or ticker. Summary rows
+        invalidated by trade writes since the last call are recomputed first.
+        """
+        group_expr, key = TRADE_ANALYTICS_GROUPS[group_by]
+        conditions, params = [], []
+        if ticker is not None:
+            params.append(ticker)
+            conditions.append(f"ticker = LOWER(${len(params)})")
+        if start_date is not None:
+            params.append(start_date)
+            conditions.append(f"trading_date >= ${len(params)}")
+        if end_date is not None:
+            params.append(end_date)
+            conditions.append(f"trading_date <= ${len(params)}")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        query = f"""
+            SELECT
+                {group_expr} AS {key},
+                {_trade_type_aggregates("real", "real")},
+                {_trade_type_aggregates("simulated", "simulated")},
+                SUM(pnl_points) FILTER (WHERE type = 'real') / NULLIF(SUM(trades) FILTER (WHERE type = 'real'), 0)
+                    - SUM(pnl_points) FILTER (WHERE type = 'simulated') / NULLIF(SUM(trades) FILTER (WHERE type = 'simulated'), 0)
+                    AS avg_points_difference,
+                SUM(entry_slippage_sum) / NULLIF(SUM(entry_slippage_count), 0) AS avg_entry_slippage,
+                COALESCE(SUM(entry_slippage_count), 0) AS matched_trades
+            FROM trade_daily_summary
+            {where}
+            GROUP BY 1
+            ORDER BY 1
+        """
+        async with self.acquire() as conn:
+            await conn.execute("SELECT refresh_trade_daily_summary()")
+            rows = await conn.fetch(query, *params)
+            return [dict(r) for r in rows]
+
+    @observe_query
     async def fetch_backtest_results(
         self,
         strategy: str,
@@ -206,20 +540,12 @@ class DatabaseManager:
         timeframe: str,
         limit: int = 10000
     ):
-        async with self.pool.acquire() as conn:
-            rows = await conn.fetch(
-                """
-                SELECT trading_date, equity, pnl
-                FROM backtest_results
-                WHERE strategy = $1 AND ticker = $2 AND timeframe = $3
-                ORDER BY trading_date DESC
-                LIMIT $4
-                """,
-                strategy, ticker, timeframe, limit
-            )
+        async with self.acquire() as conn:
+            rows = await conn.fetch(BACKTEST_RESULTS_SQL, strategy, ticker, timeframe, limit)
         # Return in chronological order
         return list(reversed([dict(r) for r in rows]))
 
+    @observe_query
     async def save_backtest_results(
         self,
         ticker: str,
@@ -228,51 +554,51 @@ class DatabaseManager:
         # strategy_params: Optional[dict] = None
     ):
         """
-        Save backtest results to the database.
+        Save backtest results to the database in one statement, whatever the number
+        of strategies they cover.
 
         Args:
             ticker: ticker symbol
             timeframe: timeframe string
-            results: list of dicts with keys: trading_date, equity, pnl
+            results: list of dicts with keys: trading_date, equity, pnl, strategy
             strategy_params: optional dict of strategy parameters
         """
         if not results:
             return
 
-        async with self.pool.acquire() as conn:
-            async with conn.transaction():
-                rows = []
-                for r in results:
-                    rows.append((
-                        ticker,
-                        timeframe,
-                        r["trading_date"],
-                        r["equity"],
-                        r["pnl"],
-                        r["strategy"],
-                    ))
-
-                await conn.executemany("""
-                    INSERT INTO backtest_results
-                        (ticker, timeframe, trading_date, equity, pnl, strategy)
-                    VALUES ($1, $2, $3, $4, $5, $6)
-                    ON CONFLICT (ticker, timeframe, trading_date, strategy)
-                    DO UPDATE SET
-                        equity = EXCLUDED.equity,
-                        pnl = EXCLUDED.pnl,
-                        created_at = NOW()
-                """, rows)
+        async with self.acquire() as conn:
+            await conn.execute("""
+                INSERT INTO backtest_results
+                    (ticker, timeframe, trading_date, equity, pnl, strategy)
+                SELECT $1, $2, r.trading_date, r.equity, r.pnl, r.strategy
+                FROM unnest($3::date[], $4::float8[], $5::float8[], $6::text[])
+                    AS r(trading_date, equity, pnl, strategy)
+                ON CONFLICT (ticker, timeframe, trading_date, strategy)
+                DO UPDATE SET
+                    equity = EXCLUDED.equity,
+                    pnl = EXCLUDED.pnl,
+                    created_at = NOW()
+            """,
+                ticker,
+                timeframe,
+                [r["trading_date"] for r in results],
+                [float(r["equity"]) for r in results],
+                [float(r["pnl"]) for r in results],
+                [r["strategy"] for r in results],
+            )
 
+        for strategy in {r["strategy"] for r in results}:
+            backtest_results_cache.invalidate((strategy, ticker, timeframe))
+
+    @observe_query
     async def get_user_by_username(self, username: str) -> Optional[dict]:
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(
-                "SELECT id, username, email, hashed_password, is_active, created_at FROM users WHERE username = $1",
-                username
-            )
+        async with self.acquire() as conn:
+            row = await conn.fetchrow(USER_BY_USERNAME_SQL, username)
             return dict(row) if row else None
 
+    @observe_query
     async def create_user(self, username: str, email: str, hashed_password: str) -> dict:
-        async with self.pool.acquire() as conn:
+        async with self.acquire() as conn:
             row = await conn.fetchrow(
                 """
                 INSERT INTO users (username, email, hashed_password, is_active, created_at)
@@ -281,6 +607,7 @@ class DatabaseManager:
                 """,
                 username, email, hashed_password
             )
-            return dict(row)
+        principal_cache.invalidate(row["username"])
+        return dict(row)
 
 db = DatabaseManager()
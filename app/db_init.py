@@ -59,6 +59,10 @@ async def init_db_with_csv():
 
         # --- Step 4: Insert into DB ---
         if rows:
+            await conn.execute(
+                "SELECT ensure_market_snapshot_partitions($1, $2)",
+                df["timestamp"].min().to_pydatetime(), df["timestamp"].max().to_pydatetime()
+            )
             await conn.executemany(INSERT_ROW_SQL, rows)
             print(f"✅ Inserted {len(rows)} rows into database")
         else:
@@ -1,13 +1,19 @@
+import asyncio
 from loguru import logger
 import pandas as pd
 from app.db import db
+from app.services.candle_cache import candle_cache, load_recent_candles
+from app.services.candle_store import candle_store
+from app.services.pubsub import candle_relay
 from datetime import datetime, timezone
 from app.utils.data_pipeline_utils import get_hist_price_from_tiingo
 from app.utils.date_utils import process_candles
 
-
-async def sync_forex_data(ticker: str, timeframe: str):
-    """Scheduled job to sync forex data from external API"""
+async def sync_forex_data(ticker: str, timeframe: str) -> datetime | None:
+    """
+    Scheduled job to sync forex data from external API.
+    Returns the timestamp of the newest candle stored, so the scheduler can report data lag.
+    """
     logger.info(f"🔄 Starting forex sync for {ticker} {timeframe}")
 
     try:
@@ -23,7 +29,7 @@ async def sync_forex_data(ticker: str, timeframe: str):
 
             if not raw_data:
                 logger.warning("⚡ No new records from API")
-                return
+                return last_ts
             
             # --- 2. Normalize into DataFrame
             new_candles = pd.DataFrame([
@@ -43,10 +49,10 @@ async def sync_forex_data(ticker: str, timeframe: str):
             new_candles = new_candles[new_candles["timestamp"] >= last_ts]
             if new_candles.empty:
                 logger.warning("⚡ No new records to insert after filtering")
-                return
+                return last_ts
             
             # --- 3. Fetch overlap from DB (for recomputation & unconfirmed candles)
-            recent_df = await db.get_recent_candles(ticker, timeframe)
+            recent_df = await load_recent_candles(ticker, timeframe)
 
             # --- 4. Combine & dedupe (favor new_candles)
             combined_df = pd.concat([recent_df[["ticker", "timeframe", "timestamp", "open", "high", "low", "close"]], new_candles], ignore_index=True)
@@ -75,13 +81,25 @@ async def sync_forex_data(ticker: str, timeframe: str):
 
             if processed_records:
                 await db.upsert_candles(ticker, timeframe, processed_records)
+                candle_store.merge(ticker, timeframe, to_upsert)
+                try:
+                    await asyncio.to_thread(candle_cache.append, ticker, timeframe, to_upsert)
+                except Exception as e:
+                    # The cache is detected as stale and rebuilt from the DB on next load
+                    logger.warning(f"⚠️ Failed to update candle cache for {ticker} {timeframe}: {e}")
+
+                # Fan out to the streaming clients of every worker
+                await candle_relay.publish(ticker, timeframe, to_upsert)
             else:
                 logger.info("⚡ No new records to insert")
+                return last_ts
             
             logger.info(f"✅ Completed forex sync for {ticker} {timeframe}")
+            return pd.Timestamp(to_upsert["timestamp"].max()).to_pydatetime()
 
         else:
-            logger.error(f"Something went wrong, as there is no existing data for {ticker} {timeframe}. Please check the initial data load process.")
+            raise RuntimeError(f"Something went wrong, as there is no existing data for {ticker} {timeframe}. Please check the initial data load process.")
    
     except Exception as e:
-        logger.error(f"❌ Forex sync failed for {ticker} {timeframe}: {e}, exc_info=True")
+        logger.error(f"❌ Forex sync failed for {ticker} {timeframe}: {e}")
+        raise
@@ -1,18 +1,37 @@
-from fastapi import FastAPI, HTTPException
+import pandas as pd
+from functools import partial
+from fastapi import FastAPI, HTTPException, Response, Query, Header
 from fastapi.responses import HTMLResponse
 from contextlib import asynccontextmanager
-from app.db import db
+from app.db import db, INTRADAY_COLUMNS
 from app.db_init import init_db_with_csv
 from loguru import logger
 from app.services.scheduler import scheduler_service
+from app.services.leader import scheduler_leader
+from app.services.pubsub import candle_relay
+from app.services.metrics import MetricsMiddleware, DatabasePoolCollector, JobStatsCollector
+from app.services.profiling import ProfilingMiddleware, PROFILE_ID_HEADER, stage
+from app.services.indicators import parse_indicators, load_indicators, indicator_columns
+from app.services.candle_cache import fresh_candles, warm_candle_store
+from app.services.singleflight import intraday_flights, indicator_flights
+from prometheus_client import REGISTRY
 from app.schemas.core import CandleRequest
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import timezone
-from zoneinfo import ZoneInfo
+from datetime import date, datetime, timedelta, timezone
+from app.cache import intraday_cache
+from app.config import INTRADAY_CURRENT_DAY_TTL, INTRADAY_CLOSE_GRACE_MINUTES, FAST_JSON_RESPONSES
+from app.responses import (
+    FastJSONResponse, ColumnarResult, RESPONSE_FORMAT_PATTERN, negotiate_format, columnar_response
+)
+from app.constants import SGT
+from app.utils.date_utils import get_trading_date
 from app.routes import (
-    auth, backtest, trades, status
+    analytics, auth, backtest, candles, metrics, profiles, trades, status, stream
 )
 
+REGISTRY.register(DatabasePoolCollector(db))
+REGISTRY.register(JobStatsCollector(scheduler_service))
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -20,7 +39,11 @@ async def lifespan(app: FastAPI):
     try:
         await db.connect()
         # await init_db_with_csv()
-        scheduler_service.start()
+        await warm_candle_store()
+        # Relays the leader's candle updates to this worker's streaming clients
+        await candle_relay.start()
+        # Only the worker holding the scheduler lock runs jobs
+        await scheduler_leader.start()
         logger.info("✅ Application startup complete")
     except Exception as e:
         logger.error(f"❌ Error during startup: {e}")
@@ -29,7 +52,8 @@ async def lifespan(app: FastAPI):
 
     logger.info("🛑 Stopping Martlet backend")
     try:
-        scheduler_service.stop()
+        await scheduler_leader.stop()
+        await candle_relay.stop()
         await db.disconnect()
         logger.info("✅ DB disconnected")
     except Exception as e:
@@ -43,12 +67,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[trades.NEXT_CURSOR_HEADER, PROFILE_ID_HEADER, "Server-Timing"],
 )
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(auth.router)
 app.include_router(trades.router)
+app.include_router(analytics.router)
 app.include_router(status.router)
 app.include_router(backtest.router)
+app.include_router(candles.router)
+app.include_router(stream.router)
+app.include_router(metrics.router)
+app.include_router(profiles.router)
 
 @app.get("/", response_class=HTMLResponse)
 async def home():
@@ -65,8 +97,52 @@ async def home():
     return html_content
 
 
+def is_closed_trading_day(trading_date: date) -> bool:
+    """A trading day is closed (and its candles final) once the grace period after its close has passed"""
+    grace_cutoff = datetime.now(timezone.utc) - timedelta(minutes=INTRADAY_CLOSE_GRACE_MINUTES)
+    return trading_date < get_trading_date(grace_cutoff)
+
+
+async def load_intraday(ticker: str, timeframe: str, trading_date: date | None, closed: bool) -> ColumnarResult:
+    """One trading day's candles as columns, stored in intraday_cache"""
+    cache_key = (ticker, timeframe, trading_date)
+    version = intraday_cache.version
+
+    with stage("db_fetch"):
+        candles = await fresh_candles(ticker, timeframe) if trading_date is not None else None
+        if candles is None:
+            rows = await db.fetch_intraday_candles(ticker, timeframe, trading_date)
+
+    with stage("build"):
+        if candles is not None:
+            result = ColumnarResult(candles.to_columns(*candles.day_bounds(trading_date), INTRADAY_COLUMNS))
+        else:
+            result = ColumnarResult.from_records(rows, INTRADAY_COLUMNS)
+        # Convert all timestamps to SGT in one vectorized pass
+        result.columns["timestamp_sgt"] = list(
+            pd.to_datetime(result.columns["timestamp"], utc=True)
+            .tz_convert(SGT)
+            .to_pydatetime()
+        )
+
+    if trading_date is not None:
+        # An empty closed day is more likely not backfilled yet (or a typo) than final
+        intraday_cache.set(
+            cache_key, result,
+            ttl=None if closed and len(result) else INTRADAY_CURRENT_DAY_TTL,
+            version=version
+        )
+    return result
+
+
 @app.post("/intraday/")
-async def fetch_intraday_data(payload: CandleRequest):
+async def fetch_intraday_data(
+    payload: CandleRequest,
+    response: Response,
+    format: str | None = Query(None, pattern=RESPONSE_FORMAT_PATTERN, description="rows (default), columns or arrow"),
+    indicators: str | None = Query(None, description="Comma-separated indicators, e.g. ema50,atr14,rsi14,bb20,sma20,range20"),
+    accept: str | None = Header(None),
+):
     """Return intraday data for a given ticker, timeframe and trading_date"""
 
     ticker = payload.ticker
@@ -80,25 +156,44 @@ async def fetch_intraday_data(payload: CandleRequest):
             status_code=400,
             detail=f"Timeframe '{timeframe}' is not supported. Allowed: {INTRADAY_TIMEFRAMES}"
         )
-    
-    async with db.pool.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT timestamp, ticker, timeframe, open, high, low, close, trading_date, ema20, prev_day_high, prev_day_low
-            FROM market_snapshot
-            WHERE ticker = $1 AND timeframe = $2 AND trading_date = $3
-            ORDER BY timestamp ASC
-            """,
-            ticker, timeframe, trading_date
+
+    try:
+        indicator_names = parse_indicators(indicators)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    closed = trading_date is not None and is_closed_trading_day(trading_date)
+    cache_key = (ticker, timeframe, trading_date)
+    result = intraday_cache.get(cache_key)
+
+    if result is None:
+        result = await intraday_flights.do(
+            cache_key, partial(load_intraday, ticker, timeframe, trading_date, closed)
         )
 
-    result = []
-    for record in rows:
-        row = dict(record)
-        ts_utc = row["timestamp"]
-        if ts_utc.tzinfo is None:
-            ts_utc = ts_utc.replace(tzinfo=timezone.utc)
-        row["timestamp_sgt"] = ts_utc.astimezone(ZoneInfo("Asia/Singapore"))
-        result.append(row)
+    if closed and len(result):
+        headers = {"Cache-Control": "public, max-age=31536000, immutable", "Vary": "Accept"}
+    else:
+        headers = {"Cache-Control": f"public, max-age={int(INTRADAY_CURRENT_DAY_TTL)}", "Vary": "Accept"}
 
-    return result
+    if indicator_names and len(result):
+        # Computed over the full history (so the day starts warmed up) and sliced to the day
+        with stage("indicators"):
+            series = await indicator_flights.do(
+                (ticker, timeframe, tuple(indicator_names)),
+                partial(load_indicators, ticker, timeframe, indicator_names)
+            )
+            result = ColumnarResult({
+                **result.columns,
+                **indicator_columns(series, result.columns["timestamp"])
+            })
+
+    fmt = negotiate_format(accept, format)
+    if fmt != "rows":
+        return columnar_response(result.columns, fmt, headers=headers)
+
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(result.rows, headers=headers)
+
+    response.headers.update(headers)
+    return result.rows
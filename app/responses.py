@@ -0,0 +1,95 @@
+from decimal import Decimal
+from functools import cached_property
+from typing import Any, Iterable
+import orjson
+import pandas as pd
+import pyarrow as pa
+from fastapi.responses import JSONResponse, Response
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+COLUMNS_JSON_MEDIA_TYPE = "application/vnd.martlet.columns+json"
+RESPONSE_FORMAT_PATTERN = "^(rows|columns|arrow)$"
+
+
+def _default(obj: Any):
+    """Fallback for types orjson does not serialize natively"""
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+    Routes return it with plain dicts/lists that are already in the response shape,
+    which skips both response_model validation and FastAPI's jsonable_encoder pass.
+    The content may also be pre-rendered bytes.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+class ArrowStreamResponse(Response):
+    """Arrow IPC stream of a table; content may be a pyarrow.Table or a dict of columns"""
+    media_type = ARROW_STREAM_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        table = content if isinstance(content, pa.Table) else pa.table(content)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+
+class ColumnarResult:
+    """A query result held column-wise; the row-oriented form is only built when requested"""
+
+    def __init__(self, columns: dict[str, list]):
+        self.columns = columns
+
+    @classmethod
+    def from_records(cls, records: Iterable, names: list[str]) -> "ColumnarResult":
+        """Transpose asyncpg records (or any row tuples in `names` order) into columns"""
+        values = list(zip(*records)) or [() for _ in names]
+        return cls({name: list(column) for name, column in zip(names, values)})
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), []))
+
+    @cached_property
+    def rows(self) -> list[dict]:
+        names = list(self.columns)
+        return [dict(zip(names, values)) for values in zip(*self.columns.values())]
+
+
+def negotiate_format(accept: str | None, format: str | None = None) -> str:
+    """
+    Pick the response shape: an explicit `format` query parameter wins, then the Accept header.
+      rows    - JSON list of objects (default)
+      columns - JSON object of {column: [values]}
+      arrow   - Arrow IPC stream
+    """
+    if format:
+        return format
+    if accept:
+        if ARROW_STREAM_MEDIA_TYPE in accept:
+            return "arrow"
+        if COLUMNS_JSON_MEDIA_TYPE in accept:
+            return "columns"
+    return "rows"
+
+
+def columnar_response(columns: dict[str, list], fmt: str, headers: dict | None = None) -> Response:
+    """Render columns as an Arrow stream or as column-oriented JSON"""
+    if fmt == "arrow":
+        return ArrowStreamResponse(columns, headers=headers)
+    return FastJSONResponse(columns, media_type=COLUMNS_JSON_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,21 @@
+from datetime import date
+from typing import Optional
+from fastapi import APIRouter, Query
+from app.db import db
+from app.schemas.trade import TradeAnalytics
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+@router.get("/trades", response_model=list[TradeAnalytics])
+async def trade_analytics(
+    group_by: str = Query("day", pattern="^(day|week|ticker)$", description="day, week or ticker"),
+    ticker: Optional[str] = Query(None),
+    start_date: Optional[date] = Query(None, description="Earliest trading_date (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Latest trading_date (inclusive)"),
+):
+    """
+    PnL, win rate, average points and R of real vs simulated trades, with the gap between them
+    and the entry slippage of real trades against the nearest simulated entry on the same day.
+    Weeks start on Monday.
+    """
+    return await db.fetch_trade_analytics(group_by, ticker, start_date, end_date)
@@ -5,7 +5,7 @@ from datetime import timedelta
 
 from app.db import db
 from app.schemas.user import UserCreate, UserLogin, User
-from app.services.auth.utils import hash_password, verify_password, create_access_token
+from app.services.auth.utils import hash_password_async, verify_password_async, create_access_token
 from app.services.auth.dependencies import get_current_user
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -20,7 +20,7 @@ async def register(user: UserCreate):
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already registered")
 
-    hashed_pwd = hash_password(user.password)
+    hashed_pwd = await hash_password_async(user.password)
     new_user = await db.create_user(username=user.username, email=user.email, hashed_password=hashed_pwd)
     return new_user
 
@@ -29,7 +29,7 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends()):
     print("Logging in user:", form_data.username)
     user = await db.get_user_by_username(form_data.username)
     
-    if not user or not verify_password(form_data.password, user["hashed_password"]):
+    if not user or not await verify_password_async(form_data.password, user["hashed_password"]):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
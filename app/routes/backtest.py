@@ -1,105 +1,242 @@
-from fastapi import APIRouter, HTTPException, Query
-from datetime import datetime, timezone
+from bisect import bisect_right
+from functools import cached_property, partial
+from fastapi import APIRouter, HTTPException, Query, Header, Response
+from datetime import date, datetime, time
 from app.db import db
-from app.schemas.backtest import BacktestRequest, BacktestResult, BacktestSettings
-from app.utils.backtest_utils import get_daily_summary
+from app.cache import backtest_results_cache
+from app.config import FAST_JSON_RESPONSES
+from app.responses import (
+    FastJSONResponse, dumps, RESPONSE_FORMAT_PATTERN, negotiate_format, columnar_response
+)
+from app.schemas.backtest import (
+    BacktestRequest, BacktestResult, BacktestSettings,
+    BacktestBatchRequest, BacktestBatchResult
+)
+from app.utils.downsample_utils import lttb_indices, MAX_CHART_POINTS
+from app.utils.http_utils import make_etag, etag_matches
 from loguru import logger
-from pandas import DataFrame, date_range, concat
-from app.services.backtest import run_backtest
+from pandas import DataFrame
+from app.services.backtest import (
+    STRATEGY_MAP, run_backtest, run_backtests, build_settings, daily_equity_curve, BACKTEST_START
+)
+from app.services.candle_cache import load_candles
+from app.services.profiling import stage
+from app.services.singleflight import backtest_run_flights, backtest_results_flights
+from app.services.indicators import parse_indicators, load_indicator_columns
 
 
 router = APIRouter(prefix="/backtest", tags=["Backtest"])
 
-@router.get("/results/", response_model=list[BacktestResult])
-async def backtest_results(
-    strategy: str = Query(..., description="Trading strategy name"),
-    ticker: str = Query(..., description="Ticker symbol"),
-    timeframe: str = Query(..., description="Timeframe, e.g., 5min, 15min")
-):
-    logger.debug(f"Fetching backtest results for {strategy} | {ticker} | {timeframe}")
+
+def result_payload(trading_date: date, equity: float, pnl: float) -> dict:
+    """A backtest result in the exact shape of a serialized BacktestResult"""
+    return {"timestamp": datetime.combine(trading_date, time()), "equity": float(equity), "pnl": float(pnl)}
+
+
+class CachedBacktestResults:
+    """Backtest results for one (strategy, ticker, timeframe), as held in backtest_results_cache"""
+
+    def __init__(self, results: list[dict]):
+        self.results = results
+        self.dates = [r["trading_date"] for r in results]
+        self.models = [
+            BacktestResult(timestamp=r["trading_date"], equity=r["equity"], pnl=r["pnl"])
+            for r in results
+        ]
+        self.digest = make_etag(*((r["trading_date"], r["equity"], r["pnl"]) for r in results))
+
+    def since_index(self, since: date) -> int:
+        """Index of the first result strictly after the given trading date"""
+        return bisect_right(self.dates, since)
+
+    @cached_property
+    def payloads(self) -> list[dict]:
+        return [result_payload(r["trading_date"], r["equity"], r["pnl"]) for r in self.results]
+
+    @cached_property
+    def columns(self) -> dict[str, list]:
+        payloads = self.payloads
+        return {name: [p[name] for p in payloads] for name in ("timestamp", "equity", "pnl")}
+
+    @cached_property
+    def body(self) -> bytes:
+        """The full, pre-rendered JSON response"""
+        return dumps(self.payloads)
+
+
+async def load_backtest_results(strategy: str, ticker: str, timeframe: str) -> CachedBacktestResults:
+    """Fetch saved results into backtest_results_cache"""
+    version = backtest_results_cache.version
     results = await db.fetch_backtest_results(strategy, ticker, timeframe)
-    
+
     if not results:
         raise HTTPException(
             status_code=404,
             detail=f'No backtest results found for "{strategy}" | "{ticker}" | "{timeframe}"'
         )
     logger.debug(f"Fetched {len(results)} records from DB")
+    cached = CachedBacktestResults(results)
+    backtest_results_cache.set((strategy, ticker, timeframe), cached, version=version)
+    return cached
+
+
+@router.get("/results/", response_model=list[BacktestResult])
+async def backtest_results(
+    response: Response,
+    strategy: str = Query(..., description="Trading strategy name"),
+    ticker: str = Query(..., description="Ticker symbol"),
+    timeframe: str = Query(..., description="Timeframe, e.g., 5min, 15min"),
+    since: date | None = Query(None, description="Only return results after this trading date"),
+    points: int | None = Query(
+        None, ge=3, le=MAX_CHART_POINTS,
+        description="Downsample the equity curve to at most this many points (LTTB)"
+    ),
+    format: str | None = Query(None, pattern=RESPONSE_FORMAT_PATTERN, description="rows (default), columns or arrow"),
+    accept: str | None = Header(None),
+    if_none_match: str | None = Header(None),
+):
+    logger.debug(f"Fetching backtest results for {strategy} | {ticker} | {timeframe}")
+    cache_key = (strategy, ticker, timeframe)
+    cached = backtest_results_cache.get(cache_key)
 
-    return [
-        BacktestResult(
-            timestamp=r["trading_date"],
-            equity=r["equity"],
-            pnl=r["pnl"]
+    if cached is None:
+        cached = await backtest_results_flights.do(
+            cache_key, partial(load_backtest_results, strategy, ticker, timeframe)
         )
-        for r in results
-    ]
 
+    fmt = negotiate_format(accept, format)
+    etag = make_etag(cached.digest, since, points, fmt)
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept"}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    start = cached.since_index(since) if since else 0
+    indices = range(start, len(cached.models))
+
+    if points is not None:
+        models = cached.models[start:]
+        indices = start + lttb_indices(
+            [r.timestamp.timestamp() for r in models],
+            [r.equity for r in models],
+            points
+        )
 
-@router.post("/run/", response_model=list[BacktestResult])
-async def trigger_backtest_run(req: BacktestRequest):
-    data = await db.fetch_market_snapshot_by_ticker_by_timeframe(req.ticker, req.timeframe)
-    if not data:
-        raise HTTPException(status_code=404, detail=f'No market data found for "{req.ticker}" and "{req.timeframe}"')
-
-    df = DataFrame(data)
-    
-    start_date = datetime(2022, 1, 1, tzinfo=timezone.utc)
-    df = df[df['timestamp'] >= start_date]
-    logger.debug(f"Fetched {len(df)} rows of data from DB for {req.ticker} | {req.timeframe}")
-
-    all_dates = date_range(
-        start=df["timestamp"].min(),
-        end=df["timestamp"].max(),
-    )
-
-    if req.strategy == "previous_day_breakout":
-        backtest_settings = BacktestSettings()
-        backtest_settings.strategy.take_profit = 4
-        backtest_settings.strategy.stop_loss = 5
-        backtest_settings.strategy.risk_per_trade = 0.05
-    elif req.strategy == "compression_breakout_scalp":
-        backtest_settings = BacktestSettings()
-        backtest_settings.strategy.take_profit = 1.2
-        backtest_settings.strategy.stop_loss = 28
-        backtest_settings.strategy.risk_per_trade = 1
-    else:
-        raise HTTPException(status_code=400, detail=f'Unknown strategy "{req.strategy}"')
-
-    results = run_backtest(df, req.strategy, backtest_settings)
-
-    df_daily_summary, drawdown_periods = get_daily_summary(results, backtest_settings.account.starting_cash)
-    logger.info(f'Backtest completed for "{req.strategy} | {req.ticker}" | "{req.timeframe}"')
-
-    calendar_df = DataFrame({"trading_date": all_dates})
-    calendar_df["trading_date"] = calendar_df["trading_date"].dt.date
-    df_daily_summary = calendar_df.merge(df_daily_summary, on="trading_date", how="left")
-
-    # Insert the start row at the beginning
-    start_row = DataFrame({
-        "trading_date": [start_date.date()],
-        "pnl": [0],
-        "equity": [backtest_settings.account.starting_cash],
-    })
-    df_daily_summary = concat([start_row, df_daily_summary[["trading_date", "pnl", "equity"]]], ignore_index=True)
-
-    # forward-fill equity, fill pnl=0 for missing days
-    df_daily_summary["equity"] = df_daily_summary["equity"].ffill()
-    df_daily_summary["pnl"] = df_daily_summary["pnl"].fillna(0)
-
-    results_to_save = [
-        {
-            "trading_date": row["trading_date"],
-            "equity": row["equity"],
-            "pnl": row["pnl"],
-            "strategy": req.strategy,
-        }
-        for _, row in df_daily_summary.iterrows()
-    ]
+    if fmt != "rows":
+        columns = {name: [values[i] for i in indices] for name, values in cached.columns.items()}
+        return columnar_response(columns, fmt, headers=headers)
+
+    if FAST_JSON_RESPONSES:
+        if start == 0 and points is None:
+            return FastJSONResponse(cached.body, headers=headers)
+        return FastJSONResponse([cached.payloads[i] for i in indices], headers=headers)
+
+    response.headers.update(headers)
+    return [cached.models[i] for i in indices]
+
+
+def strategy_settings(strategy: str, overrides: dict | None = None) -> BacktestSettings:
+    """build_settings, with unknown strategies and invalid overrides as 400s"""
+    try:
+        return build_settings(strategy, overrides)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def load_backtest_candles(ticker: str, timeframe: str, indicators: list[str]) -> DataFrame:
+    """Candles from BACKTEST_START on, with indicator columns computed over the full history"""
+    try:
+        indicator_names = parse_indicators(indicators)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    await db.save_backtest_results(req.ticker, req.timeframe, results_to_save)
+    with stage("db_fetch"):
+        df = await load_candles(ticker, timeframe)
+    if df.empty:
+        raise HTTPException(status_code=404, detail=f'No market data found for "{ticker}" and "{timeframe}"')
 
-    return [
-        BacktestResult(timestamp=r["trading_date"], equity=r["equity"], pnl=r["pnl"])
-        for r in results_to_save
+    with stage("dataframe_build"):
+        # Indicators are computed over the full history before it is cut to the backtest window
+        df = await load_indicator_columns(ticker, timeframe, df, indicator_names)
+        df = df[df['timestamp'] >= BACKTEST_START]
+        logger.debug(f"Loaded {len(df)} rows of market data for {ticker} | {timeframe}")
+    return df
+
+
+def result_payloads(results: list[dict]) -> list[dict]:
+    return [result_payload(r["trading_date"], r["equity"], r["pnl"]) for r in results]
+
+
+async def backtest_run(req: BacktestRequest) -> list[dict]:
+    """Run a backtest, save its equity curve and return it as result payloads"""
+    df = await load_backtest_candles(req.ticker, req.timeframe, req.indicators)
+    backtest_settings = strategy_settings(req.strategy)
+
+    with stage("strategy_loop"):
+        results = run_backtest(df, req.strategy, backtest_settings)
+
+    with stage("daily_summary"):
+        results_to_save = daily_equity_curve(results, df, backtest_settings, req.strategy)
+        logger.info(f'Backtest completed for "{req.strategy} | {req.ticker}" | "{req.timeframe}"')
+
+    with stage("save"):
+        await db.save_backtest_results(req.ticker, req.timeframe, results_to_save)
+
+    return result_payloads(results_to_save)
+
+
+@router.post("/run/", response_model=list[BacktestResult])
+async def trigger_backtest_run(req: BacktestRequest):
+    """Identical concurrent runs share one computation"""
+    try:
+        key = (req.ticker, req.timeframe, req.strategy, tuple(parse_indicators(req.indicators)))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    payload = await backtest_run_flights.do(key, partial(backtest_run, req))
+
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(payload)
+    return payload
+
+
+@router.post("/batch/", response_model=list[BacktestBatchResult])
+async def trigger_backtest_batch(req: BacktestBatchRequest):
+    """
+    Run several (strategy, settings) pairs over one ticker and timeframe. The candles are
+    loaded once, every strategy is evaluated in the same pass over the bars and all
+    equity curves are saved in one write, each under its run's label. A label may not
+    name a strategy other than the run's own, so a batch never overwrites that strategy's curve.
+    """
+    labels = [run.label or run.strategy for run in req.runs]
+    if len(set(labels)) != len(labels):
+        raise HTTPException(status_code=400, detail="Each run needs a distinct label")
+    for run, label in zip(req.runs, labels):
+        # Curves are saved under their label, which /backtest/results/ serves as a strategy
+        if label in STRATEGY_MAP and label != run.strategy:
+            raise HTTPException(
+                status_code=400,
+                detail=f'Label "{label}" is the name of another strategy; pick a label that is not a strategy name'
+            )
+    runs = [(run.strategy, strategy_settings(run.strategy, run.strategy_settings)) for run in req.runs]
+
+    df = await load_backtest_candles(req.ticker, req.timeframe, req.indicators)
+
+    with stage("strategy_loop"):
+        trades = run_backtests(df, runs)
+
+    with stage("daily_summary"):
+        curves = [
+            daily_equity_curve(run_trades, df, settings, label)
+            for run_trades, (_, settings), label in zip(trades, runs, labels)
+        ]
+        logger.info(f'Batch backtest of {len(runs)} runs completed for "{req.ticker}" | "{req.timeframe}"')
+
+    with stage("save"):
+        await db.save_backtest_results(req.ticker, req.timeframe, [r for curve in curves for r in curve])
+
+    payload = [
+        {"strategy": label, "results": result_payloads(curve)}
+        for label, curve in zip(labels, curves)
     ]
+    if FAST_JSON_RESPONSES:
+        return FastJSONResponse(payload)
+    return payload
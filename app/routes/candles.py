@@ -0,0 +1,56 @@
+import math
+from fastapi import APIRouter, HTTPException, Query, Header
+from datetime import datetime, timezone
+from loguru import logger
+from app.db import db
+from app.schemas.core import ChartCandle
+from app.responses import ColumnarResult, RESPONSE_FORMAT_PATTERN, negotiate_format, columnar_response
+from app.utils.date_utils import timeframe_to_seconds
+from app.utils.downsample_utils import MAX_CHART_POINTS
+
+router = APIRouter(prefix="/candles", tags=["Candles"])
+
+
+@router.get("/chart/", response_model=list[ChartCandle])
+async def chart_candles(
+    ticker: str = Query(..., description="Ticker symbol"),
+    timeframe: str = Query(..., description="Stored timeframe, e.g., 5min"),
+    start: datetime = Query(..., description="Range start (UTC if no offset given)"),
+    end: datetime = Query(..., description="Range end, exclusive (UTC if no offset given)"),
+    points: int = Query(500, ge=2, le=MAX_CHART_POINTS, description="Target number of candles"),
+    format: str | None = Query(None, pattern=RESPONSE_FORMAT_PATTERN, description="rows (default), columns or arrow"),
+    accept: str | None = Header(None),
+):
+    """
+    Return OHLC candles for an arbitrary range, aggregated server-side into buckets
+    so that the response holds roughly `points` candles however long the range is.
+    """
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+
+    try:
+        timeframe_seconds = timeframe_to_seconds(timeframe)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Smallest multiple of the stored timeframe that fits the range into `points` buckets
+    range_seconds = (end - start).total_seconds()
+    bucket_seconds = max(1, math.ceil(range_seconds / points / timeframe_seconds)) * timeframe_seconds
+
+    # Buckets start at the first stored candle in range rather than the epoch, so the
+    # candles span at most the range and fill no more than `points` buckets
+    origin = datetime.fromtimestamp(
+        math.ceil(start.timestamp() / timeframe_seconds) * timeframe_seconds, tz=timezone.utc
+    )
+    rows = await db.fetch_candle_buckets(ticker, timeframe, start, end, bucket_seconds, origin)
+    logger.debug(f"Aggregated {ticker} | {timeframe} into {len(rows)} buckets of {bucket_seconds}s")
+
+    fmt = negotiate_format(accept, format)
+    if fmt != "rows":
+        columns = ColumnarResult.from_records(rows, list(ChartCandle.model_fields)).columns
+        return columnar_response(columns, fmt, headers={"Vary": "Accept"})
+    return [dict(r) for r in rows]
@@ -0,0 +1,9 @@
+from fastapi import APIRouter, Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of all registered metrics"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
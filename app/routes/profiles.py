@@ -0,0 +1,18 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi.responses import FileResponse
+from app.services.auth.dependencies import get_current_user
+from app.services.profiling import profile_path, PROFILE_ID_PATTERN
+
+router = APIRouter(prefix="/profiles", tags=["Profiles"])
+
+@router.get("/{profile_id}")
+async def get_profile(
+    profile_id: str = Path(..., pattern=PROFILE_ID_PATTERN),
+    current_user: dict = Depends(get_current_user),
+):
+    """Download a stored request profile (open it in https://www.speedscope.app)"""
+    path = profile_path(profile_id)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail=f'Profile "{profile_id}" not found')
+    return FileResponse(path, media_type="application/json", filename=os.path.basename(path))
@@ -1,20 +1,30 @@
 from fastapi import APIRouter
 from app.db import db
 from app.services.scheduler import scheduler_service
+from app.services.leader import scheduler_leader
 
 router = APIRouter(prefix="/status", tags=["Status"])
 
 @router.get("/")
 async def get_status():
     try:
-        async with db.pool.acquire() as conn:
+        async with db.acquire() as conn:
             await conn.fetchval("SELECT 1")
         db_status = "connected"
     except Exception as e:
         db_status = f"error: {e}"
 
+    if not scheduler_service.is_running:
+        scheduler_status = "stopped"
+    elif scheduler_service.is_paused:
+        scheduler_status = "paused"
+    else:
+        scheduler_status = "running"
+
     return {
         "database": db_status,
-        "scheduler": "running" if scheduler_service.is_running else "stopped",
-        "jobs": len(scheduler_service.get_jobs())
+        "scheduler": scheduler_status,
+        "scheduler_leader": scheduler_leader.is_leader,
+        "jobs": len(scheduler_service.get_jobs()),
+        "job_info": scheduler_service.get_job_info(),
     }
@@ -0,0 +1,46 @@
+import asyncio
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+from app.config import STREAM_HEARTBEAT_SECONDS
+from app.services.pubsub import candle_broker
+
+router = APIRouter(prefix="/stream", tags=["Stream"])
+
+
+@router.get("/candles")
+async def stream_candles(
+    request: Request,
+    ticker: str = Query(..., description="Ticker symbol"),
+    timeframe: str = Query(..., description="Timeframe, e.g., 5min"),
+):
+    """
+    Server-Sent Events stream of new and updated candles for a (ticker, timeframe),
+    pushed whenever the sync job upserts bars.
+
+    Events:
+      candles - JSON list of candles (with ema20 and previous-day fields)
+      lagged  - the client fell behind and missed updates; refetch /intraday/ to resync
+    """
+    subscription = candle_broker.subscribe(ticker, timeframe)
+
+    async def events():
+        try:
+            yield ": connected\n\n"
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout=STREAM_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if subscription.lagged:
+                    subscription.lagged = False
+                    yield f"event: lagged\ndata: {subscription.dropped}\n\n"
+                yield f"event: candles\ndata: {message}\n\n"
+        finally:
+            candle_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
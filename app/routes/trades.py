@@ -1,16 +1,64 @@
-from fastapi import APIRouter, HTTPException, Query
-from datetime import datetime, timezone
+import base64
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Response, UploadFile
+from datetime import date, datetime, timezone
+from typing import Optional
 from zoneinfo import ZoneInfo
 from app.db import db
-from app.schemas.trade import Trade, TradeCreate
+from app.schemas.trade import Trade, TradeCreate, TradeImportResult
 from app.utils.date_utils import get_trading_date
+from app.utils.trade_import_utils import prepare_import
 from loguru import logger
 
 router = APIRouter(prefix="/trades", tags=["Trades"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+JSON_LINES_TYPES = {"application/x-ndjson", "application/jsonl", "application/json"}
+JSON_LINES_SUFFIXES = (".jsonl", ".ndjson", ".json")
+
+
+def encode_cursor(trading_date: date, created_at: datetime, trade_id: int) -> str:
+    raw = f"{trading_date.isoformat()}|{created_at.isoformat()}|{trade_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[date, datetime, int]:
+    try:
+        trading_date, created_at, trade_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return date.fromisoformat(trading_date), datetime.fromisoformat(created_at), int(trade_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/", response_model=list[Trade])
-async def list_trades(limit: int = 100):
-    return await db.list_trades(limit=limit)
+async def list_trades(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header of the previous page"),
+    ticker: Optional[str] = Query(None),
+    type: Optional[str] = Query(None, pattern="^(real|simulated)$", description="Trade type: real or simulated"),
+    direction: Optional[str] = Query(None),
+    start_date: Optional[date] = Query(None, description="Earliest trading_date (inclusive)"),
+    end_date: Optional[date] = Query(None, description="Latest trading_date (inclusive)"),
+):
+    """
+    List trades, newest first; with a start_date or end_date, by trading date and then
+    newest first. When more trades may follow, the cursor for the next page is returned
+    in the X-Next-Cursor response header.
+    """
+    rows = await db.list_trades(
+        limit=limit,
+        after=decode_cursor(cursor) if cursor else None,
+        ticker=ticker,
+        trade_type=type,
+        direction=direction,
+        start_date=start_date,
+        end_date=end_date,
+    )
+    if len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last["trading_date"], last["created_at"], last["id"])
+    return rows
 
 @router.get("/{ticker}/{trading_date}")
 async def fetch_trades(
@@ -55,6 +103,37 @@ async def create_trade(trade: TradeCreate):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"DB error: {e}")
 
+@router.post("/import", response_model=TradeImportResult)
+async def import_trades(file: UploadFile):
+    """
+    Bulk import a broker statement as CSV (with a header row) or JSON lines. Columns:
+    ticker, direction, entry_price, exit_price, size, type, entry_time, exit_time and
+    optionally trading_date, notes and stop_price. Invalid rows are reported and skipped,
+    as are trades that are already in the journal.
+    """
+    filename = (file.filename or "").lower()
+    is_json = file.content_type in JSON_LINES_TYPES or filename.endswith(JSON_LINES_SUFFIXES)
+    content = await file.read()
+
+    try:
+        received, records, duplicates, errors = await asyncio.to_thread(
+            prepare_import, content, "jsonl" if is_json else "csv"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    imported, existing = await db.import_trades(records) if records else (0, [])
+    logger.info(
+        f"📥 Imported {imported}/{received} trades from {file.filename} | "
+        f"{len(duplicates) + len(existing)} duplicates | {len(errors)} errors"
+    )
+    return TradeImportResult(
+        received=received,
+        imported=imported,
+        duplicates=sorted(duplicates + existing),
+        errors=errors,
+    )
+
 @router.delete("/{trade_id}", status_code=204)
 async def delete_trade(trade_id: int):
     deleted = await db.delete_trade(trade_id)
@@ -1,13 +1,32 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from pydantic_settings import BaseSettings
 from datetime import time, datetime
-from typing import Literal
+from typing import Any, Literal, Optional
 
 
 class BacktestRequest(BaseModel):
     ticker: str
     timeframe: str
-    strategy: Literal["previous_day_breakout", "compression_breakout_scalp", "ema_respect_follow"]
+    strategy: Literal[
+        "previous_day_breakout", "compression_breakout_scalp", "previous_day_breakout_orders", "ema_respect_follow"
+    ]
+    # Extra indicator columns for the strategy to read, e.g. ["ema50", "atr14"]
+    indicators: list[str] = []
+
+class BacktestRun(BaseModel):
+    strategy: Literal[
+        "previous_day_breakout", "compression_breakout_scalp", "previous_day_breakout_orders", "ema_respect_follow"
+    ]
+    # Name the equity curve is saved under; defaults to the strategy name
+    label: Optional[str] = None
+    # StrategySettings fields overriding the strategy's defaults, e.g. {"take_profit": 6}
+    strategy_settings: dict[str, Any] = {}
+
+class BacktestBatchRequest(BaseModel):
+    ticker: str
+    timeframe: str
+    runs: list[BacktestRun] = Field(min_length=1)
+    indicators: list[str] = []
 
 class BacktestResult(BaseModel):
     timestamp: datetime
@@ -36,4 +55,8 @@ class StrategySettings(BaseModel):
 
 class BacktestSettings(BaseSettings):
     account: AccountSettings = AccountSettings()
-    strategy: StrategySettings = StrategySettings()
\ No newline at end of file
+    strategy: StrategySettings = StrategySettings()
+
+class BacktestBatchResult(BaseModel):
+    strategy: str  # the run's label
+    results: list[BacktestResult]
@@ -1,8 +1,17 @@
 from pydantic import BaseModel
-from datetime import date
+from datetime import date, datetime
 
 
 class CandleRequest(BaseModel):
     ticker: str
     timeframe: str
     trading_date: date | None = None
+
+
+class ChartCandle(BaseModel):
+    timestamp: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    bars: int
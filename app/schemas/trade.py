@@ -14,6 +14,7 @@ class Trade(BaseModel):
     entry_time: datetime
     exit_time: Optional[datetime] = None
     trading_date: Optional[date] = None
+    stop_price: Optional[float] = None
     notes: Optional[str] = None
     created_at: datetime
 
@@ -27,4 +28,37 @@ class TradeCreate(BaseModel):
     entry_time: datetime
     exit_time: Optional[datetime] = None
     trading_date: Optional[date] = None
+    stop_price: Optional[float] = None
     notes: Optional[str] = None
+
+
+class TradeAnalytics(BaseModel):
+    """Real vs simulated performance for one day, week or ticker"""
+    period: Optional[date] = None
+    ticker: Optional[str] = None
+    real_trades: int
+    real_win_rate: Optional[float] = None
+    real_pnl: float
+    real_avg_points: Optional[float] = None
+    real_avg_r: Optional[float] = None
+    simulated_trades: int
+    simulated_win_rate: Optional[float] = None
+    simulated_pnl: float
+    simulated_avg_points: Optional[float] = None
+    simulated_avg_r: Optional[float] = None
+    avg_points_difference: Optional[float] = None  # real minus simulated, per trade
+    avg_entry_slippage: Optional[float] = None  # points against the trade vs the nearest simulated entry
+    matched_trades: int
+
+
+class TradeImportError(BaseModel):
+    row: int  # 1-based data row of the uploaded file, header excluded
+    field: str
+    message: str
+
+
+class TradeImportResult(BaseModel):
+    received: int
+    imported: int
+    duplicates: list[int]  # rows already in the journal or repeated earlier in the file
+    errors: list[TradeImportError]
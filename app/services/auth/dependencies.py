@@ -2,6 +2,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from app.services.auth.utils import decode_access_token
 from app.db import db
+from app.cache import principal_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
@@ -11,10 +12,16 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
 
     username = payload["sub"]
-    user = await db.get_user_by_username(username)
+    user = principal_cache.get(username)
+    if user is None:
+        version = principal_cache.version
+        user = await db.get_user_by_username(username)
+        if user:
+            # Remove sensitive info before caching / returning
+            user.pop("hashed_password", None)
+            principal_cache.set(username, user, version=version)
+
     if not user or not user["is_active"]:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found or inactive")
 
-    # Remove sensitive info before returning
-    user.pop("hashed_password", None)
-    return user
+    return dict(user)
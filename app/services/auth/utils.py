@@ -1,8 +1,11 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Dict, Any
 import jwt
 from jwt import PyJWTError
 from passlib.context import CryptContext
+from app.config import PASSWORD_HASH_CONCURRENCY
 
 # Use Argon2 for password hashing
 pwd_context = CryptContext(
@@ -14,6 +17,14 @@ SECRET_KEY = "your-secret-key"  # load from env
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+# Argon2 is CPU-bound and takes tens of milliseconds; it runs on a small dedicated pool
+# (argon2 releases the GIL) so login bursts cannot block the event loop or starve
+# the default executor.
+_password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_CONCURRENCY,
+    thread_name_prefix="password-hash"
+)
+
 # --- Password hashing ---
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -21,6 +32,14 @@ def hash_password(password: str) -> str:
 def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
 
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, hash_password, password)
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, password, hashed)
+
 # --- JWT handling ---
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
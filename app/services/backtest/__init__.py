@@ -1,18 +1,143 @@
-from pandas import DataFrame
-from app.services.backtest.core import BacktestEngine
-from app.services.backtest.strategies.previous_day_breakout import previous_day_breakout
-from app.services.backtest.strategies.compression_breakout_scalp import compression_breakout_scalp
+import time
+from datetime import datetime, timezone
+from pandas import DataFrame, date_range, concat
+from pydantic import ValidationError
+from app.schemas.backtest import BacktestSettings, StrategySettings
+from app.utils.backtest_utils import get_daily_summary
+from app.services.backtest.core import BacktestEngine, bar_rows
+from app.services.backtest.strategies.previous_day_breakout import (
+    previous_day_breakout, previous_day_breakout_bar
+)
+from app.services.backtest.strategies.compression_breakout_scalp import (
+    compression_breakout_scalp, compression_breakout_scalp_bar
+)
+from app.services.backtest.strategies.previous_day_breakout_orders import (
+    previous_day_breakout_orders, previous_day_breakout_orders_bar
+)
+from app.services.backtest.orders import PortfolioEngine
+from app.services.metrics import BACKTEST_RUNS, BACKTEST_BARS, BACKTEST_TRADES, BACKTEST_DURATION
 
 
 STRATEGY_MAP = {
     "previous_day_breakout": previous_day_breakout,
     "compression_breakout_scalp": compression_breakout_scalp,
+    "previous_day_breakout_orders": previous_day_breakout_orders,
 }
 
+# Per-bar steps of the strategies above, for evaluating several of them in one pass
+STRATEGY_STEPS = {
+    "previous_day_breakout": previous_day_breakout_bar,
+    "compression_breakout_scalp": compression_breakout_scalp_bar,
+    "previous_day_breakout_orders": previous_day_breakout_orders_bar,
+}
+
+# Strategies that need more than BacktestEngine's single position
+STRATEGY_ENGINES = {
+    "previous_day_breakout_orders": PortfolioEngine,
+}
+
+# StrategySettings each strategy runs with unless a batch run overrides them
+STRATEGY_DEFAULTS = {
+    "previous_day_breakout": {"take_profit": 4, "stop_loss": 5, "risk_per_trade": 0.05},
+    "compression_breakout_scalp": {"take_profit": 1.2, "stop_loss": 28, "risk_per_trade": 1},
+    "previous_day_breakout_orders": {"take_profit": 4, "stop_loss": 5, "risk_per_trade": 0.05},
+}
+
+BACKTEST_START = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+
+def build_settings(strategy: str, overrides: dict | None = None) -> BacktestSettings:
+    """BacktestSettings with the strategy's defaults and the given StrategySettings overrides applied"""
+    if strategy not in STRATEGY_DEFAULTS:
+        raise ValueError(f'Unknown strategy "{strategy}"')
+    settings = BacktestSettings()
+    try:
+        settings.strategy = StrategySettings.model_validate({
+            **settings.strategy.model_dump(), **STRATEGY_DEFAULTS[strategy], **(overrides or {})
+        })
+    except ValidationError as e:
+        raise ValueError(f'Invalid settings for "{strategy}": {e}')
+    return settings
+
+
+def _record_run(strategy_name: str, bars: int, trades: int, seconds: float):
+    BACKTEST_DURATION.labels(strategy_name).observe(seconds)
+    BACKTEST_RUNS.labels(strategy_name).inc()
+    BACKTEST_BARS.labels(strategy_name).inc(bars)
+    BACKTEST_TRADES.labels(strategy_name).inc(trades)
+
 
 def run_backtest(df: DataFrame, strategy_name: str, backtest_settings, enable_time_filter=False):
     if strategy_name not in STRATEGY_MAP:
         raise ValueError(f"Unknown strategy: {strategy_name}")
-    engine = BacktestEngine(df, backtest_settings)
+    engine = STRATEGY_ENGINES.get(strategy_name, BacktestEngine)(df, backtest_settings)
+    start = time.perf_counter()
     trades = engine.run(STRATEGY_MAP[strategy_name], enable_time_filter)
+    _record_run(strategy_name, len(df), len(trades), time.perf_counter() - start)
     return DataFrame(trades)
+
+
+def run_backtests(df: DataFrame, runs: list[tuple], enable_time_filter=False) -> list[DataFrame]:
+    """
+    Evaluate several (strategy name, settings) pairs over the same candles in a single pass:
+    each bar is materialized once and handed to every strategy in turn. Returns one trades
+    DataFrame per run, in order.
+    """
+    for strategy_name, _ in runs:
+        if strategy_name not in STRATEGY_STEPS:
+            raise ValueError(f"Unknown strategy: {strategy_name}")
+
+    start = time.perf_counter()
+    rows = bar_rows(df)
+    steps = [
+        (STRATEGY_STEPS[name], STRATEGY_ENGINES.get(name, BacktestEngine)(df, settings))
+        for name, settings in runs
+    ]
+    for i in range(1, len(rows)):
+        for step, engine in steps:
+            step(engine, rows, i, enable_time_filter)
+
+    # The pass is shared, so each strategy is recorded with its full duration
+    elapsed = time.perf_counter() - start
+    for (strategy_name, _), (_, engine) in zip(runs, steps):
+        _record_run(strategy_name, len(df), len(engine.trades), elapsed)
+    return [DataFrame(engine.trades) for _, engine in steps]
+
+
+def daily_equity_curve(trades: DataFrame, df: DataFrame, settings: BacktestSettings, strategy: str) -> list[dict]:
+    """One result per calendar day of the candles, starting from the starting cash"""
+    starting_cash = settings.account.starting_cash
+    all_dates = date_range(start=df["timestamp"].min(), end=df["timestamp"].max())
+
+    if trades.empty:
+        df_daily_summary = DataFrame(columns=["trading_date", "pnl", "equity"])
+    else:
+        df_daily_summary, drawdown_periods = get_daily_summary(trades, starting_cash)
+
+    calendar_df = DataFrame({"trading_date": all_dates})
+    calendar_df["trading_date"] = calendar_df["trading_date"].dt.date
+    df_daily_summary = calendar_df.merge(df_daily_summary, on="trading_date", how="left")
+
+    # Insert the start row at the beginning
+    start_row = DataFrame({
+        "trading_date": [BACKTEST_START.date()],
+        "pnl": [0],
+        "equity": [starting_cash],
+    })
+    df_daily_summary = concat([start_row, df_daily_summary[["trading_date", "pnl", "equity"]]], ignore_index=True)
+
+    # forward-fill equity, fill pnl=0 for missing days
+    df_daily_summary["equity"] = df_daily_summary["equity"].astype("float64").ffill()
+    df_daily_summary["pnl"] = df_daily_summary["pnl"].astype("float64").fillna(0)
+
+    return [
+        {
+            "trading_date": trading_date,
+            "equity": equity,
+            "pnl": pnl,
+            "strategy": strategy,
+        }
+        for trading_date, equity, pnl in zip(
+            df_daily_summary["trading_date"], df_daily_summary["equity"], df_daily_summary["pnl"]
+        )
+    ]
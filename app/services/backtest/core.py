@@ -7,7 +7,8 @@ from app.utils.backtest_utils import (
 
 class BacktestEngine:
     def __init__(self, df: DataFrame, settings: BacktestSettings):
-        self.df = df.copy()
+        # Copy-on-write makes a shallow copy enough, and keeps shared memory candles uncopied
+        self.df = df.copy(deep=False)
         self.settings = settings
         self.equity = self.peak_equity = settings.account.starting_cash
         self.max_drawdown = 0.0
@@ -66,7 +67,94 @@ class BacktestEngine:
 
         self.current_trade = None
 
+    def manage_open_trade(self, row, prev_row):
+        """Close the open trade on its stop loss, take profit or the end of its trading day"""
+        settings = self.settings
+        side = self.current_trade["side"]
+        entry_price = self.current_trade["entry_price"]
+
+        if side == "long":
+            if row["low"] <= entry_price - settings.strategy.stop_loss:
+                self.close_trade(entry_price - settings.strategy.stop_loss, row["timestamp"], "stop_loss", row)
+                if settings.strategy.trade_until_win:
+                    self.active_day = None
+                return
+            elif row["high"] >= entry_price + settings.strategy.take_profit:
+                self.close_trade(entry_price + settings.strategy.take_profit, row["timestamp"], "take_profit", row)
+                if settings.strategy.trade_until_loss:
+                    self.active_day = None
+                return
+        elif side == "short":
+            if row["high"] >= entry_price + settings.strategy.stop_loss:
+                self.close_trade(entry_price + settings.strategy.stop_loss, row["timestamp"], "stop_loss", row)
+                if settings.strategy.trade_until_win:
+                    self.active_day = None
+                return
+            elif row["low"] <= entry_price - settings.strategy.take_profit:
+                self.close_trade(entry_price - settings.strategy.take_profit, row["timestamp"], "take_profit", row)
+                if settings.strategy.trade_until_loss:
+                    self.active_day = None
+                return
+
+        if row["trading_date"] != prev_row["trading_date"]:
+            self.close_trade(prev_row["close"], prev_row["timestamp"], "eod_close", row)
+
     def run(self, strategy_fn, enable_time_filter=False):
         logger.info(f"Running backtest: {strategy_fn.__name__} with below settings:")
         logger.info(f"{self.settings}")
         return strategy_fn(self, self.df, enable_time_filter)
+
+
+class BarRows:
+    """
+    The bars of df as plain dicts, indexable like its rows. Strategies step through these
+    instead of df.iloc, which builds a Series per bar and dominates the loop.
+
+    Dicts are built a block of bars at a time and only the most recent blocks are kept,
+    so a pass costs O(block) Python objects however long the history is: the columns of
+    df (e.g. views of shared memory candles) are never expanded in full. Strategies look
+    at neighbouring bars only, which the retained blocks always cover.
+    """
+
+    def __init__(self, df: DataFrame, block_size: int = 4096, keep_blocks: int = 3):
+        self.df = df
+        self.block_size = block_size
+        self.keep_blocks = keep_blocks
+        self._length = len(df)
+        self._blocks: dict[int, list[dict]] = {}
+        # The block read last, checked first
+        self._start, self._rows = 0, []
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, i: int) -> dict:
+        offset = i - self._start
+        if 0 <= offset < len(self._rows):
+            return self._rows[offset]
+        if not 0 <= i < self._length:
+            raise IndexError(f"bar {i} out of range")
+
+        block = i // self.block_size
+        rows = self._blocks.get(block)
+        if rows is None:
+            start = block * self.block_size
+            rows = self.df.iloc[start:start + self.block_size].to_dict(orient="records")
+            self._blocks[block] = rows
+            if len(self._blocks) > self.keep_blocks:
+                # Drop the block furthest from the bar being read
+                del self._blocks[max(self._blocks, key=lambda b: abs(b - block))]
+        self._start, self._rows = block * self.block_size, rows
+        return rows[i - self._start]
+
+
+def bar_rows(df: DataFrame) -> BarRows:
+    return BarRows(df)
+
+
+def run_strategy(step_fn, engine: "BacktestEngine", df: DataFrame, enable_time_filter=False):
+    """Drive a per-bar strategy step over every bar of df"""
+    rows = bar_rows(df)
+    for i in range(1, len(rows)):
+        step_fn(engine, rows, i, enable_time_filter)
+    return engine.trades
@@ -0,0 +1,219 @@
+import heapq
+import itertools
+from dataclasses import dataclass, field
+from pandas import DataFrame
+from app.schemas.backtest import BacktestSettings
+from app.services.backtest.core import BacktestEngine
+from app.utils.backtest_utils import get_position_size, update_iteration_data
+
+
+@dataclass
+class Order:
+    """
+    A resting order. Buy limits and sell stops trigger when the price trades down to them,
+    sell limits and buy stops when it trades up to them. Exit orders carry the position
+    they close; entry orders carry the bracket to attach to the position they open.
+    """
+    id: int
+    side: str                       # "long" (buy) or "short" (sell)
+    kind: str                       # "limit" or "stop"
+    price: float
+    size: float | None = None       # lots; None sizes the position from the risk settings at fill
+    position_id: int | None = None
+    stop_loss: float | None = None  # points from the fill price, for entry orders
+    take_profit: float | None = None
+    reason: str | None = None
+    tag: str | None = None
+
+    @property
+    def triggers_below(self) -> bool:
+        return (self.side == "long") == (self.kind == "limit")
+
+
+@dataclass
+class Position:
+    id: int
+    side: str
+    entry_price: float
+    entry_time: object
+    entry_index: int
+    trading_date: object
+    size: float
+    tag: str | None = None
+    exit_orders: list[int] = field(default_factory=list)
+
+
+class OrderBook:
+    """
+    Pending orders in two price-indexed heaps: orders that trigger at or below their price,
+    highest first, and orders that trigger at or above it, lowest first. Matching a bar only
+    pops the orders inside its low/high range, so a bar costs O(1) plus O(log n) per fill,
+    however many orders rest. Cancelled orders are dropped lazily when they surface.
+    """
+
+    def __init__(self):
+        self.orders: dict[int, Order] = {}
+        self._below: list[tuple] = []  # (-price, seq, order id)
+        self._above: list[tuple] = []  # (price, seq, order id)
+        self._seq = itertools.count()
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def add(self, order: Order):
+        self.orders[order.id] = order
+        if order.triggers_below:
+            heapq.heappush(self._below, (-order.price, next(self._seq), order.id))
+        else:
+            heapq.heappush(self._above, (order.price, next(self._seq), order.id))
+
+    def cancel(self, order_id: int):
+        if self.orders.pop(order_id, None) is not None:
+            self._dead += 1
+            if self._dead > 2 * len(self.orders) + 64:
+                self._compact()
+
+    def _compact(self):
+        self._below = [e for e in self._below if e[2] in self.orders]
+        self._above = [e for e in self._above if e[2] in self.orders]
+        heapq.heapify(self._below)
+        heapq.heapify(self._above)
+        self._dead = 0
+
+    def _pop(self, heap: list, key: float) -> list[Order]:
+        triggered = []
+        while heap and heap[0][0] <= key:
+            _, _, order_id = heapq.heappop(heap)
+            order = self.orders.pop(order_id, None)
+            if order is None:
+                self._dead = max(0, self._dead - 1)
+            else:
+                triggered.append(order)
+        return triggered
+
+    def triggered(self, high: float, low: float, bullish: bool) -> list[Order]:
+        """
+        Remove and return the orders a bar trades through, in the order the bar is assumed
+        to reach them: open, low, high, close for bullish bars and open, high, low, close
+        otherwise, nearest first on each leg.
+        """
+        below = self._pop(self._below, -low)
+        above = self._pop(self._above, high)
+        return below + above if bullish else above + below
+
+
+class PortfolioEngine(BacktestEngine):
+    """
+    BacktestEngine that holds any number of open positions and resting limit / stop orders.
+    Strategies place orders with `submit` (or enter directly with `enter`) and call
+    `process_bar` at the start of every bar, which fills the triggered orders, opens
+    positions with their bracket exits and closes positions whose exits fill.
+
+    Fills happen at the order price, or at the bar's open when it gaps through it. The
+    bracket of a position opened during a bar is first matched on the next bar. Each
+    position is sized at entry and closed trades are recorded like BacktestEngine's.
+    """
+
+    def __init__(self, df: DataFrame, settings: BacktestSettings):
+        super().__init__(df, settings)
+        self.book = OrderBook()
+        self.positions: dict[int, Position] = {}
+        self._ids = itertools.count(1)
+
+    def submit(
+        self,
+        side: str,
+        kind: str,
+        price: float,
+        size: float | None = None,
+        stop_loss: float | None = None,
+        take_profit: float | None = None,
+        tag: str | None = None,
+    ) -> int:
+        """Place a resting entry order with an optional bracket (in points), returning its id"""
+        order = Order(next(self._ids), side, kind, price, size, stop_loss=stop_loss, take_profit=take_profit, tag=tag)
+        self.book.add(order)
+        return order.id
+
+    def cancel(self, order_id: int):
+        self.book.cancel(order_id)
+
+    def cancel_entries(self, tag: str | None = None):
+        """Cancel resting entry orders, optionally only those with the given tag"""
+        for order in list(self.book.orders.values()):
+            if order.position_id is None and (tag is None or order.tag == tag):
+                self.book.cancel(order.id)
+
+    def enter(self, side: str, price: float, time, index: int, trading_date, size: float | None = None,
+              stop_loss: float | None = None, take_profit: float | None = None, tag: str | None = None) -> Position:
+        """Open a position at a known price, e.g. the next bar's open"""
+        position = Position(
+            next(self._ids), side, price, time, index, trading_date,
+            size if size is not None else get_position_size(self.equity, self.settings), tag,
+        )
+        self.positions[position.id] = position
+        exit_side = "short" if side == "long" else "long"
+        sign = 1 if side == "long" else -1
+        if stop_loss is not None:
+            self._add_exit(position, Order(next(self._ids), exit_side, "stop", price - sign * stop_loss, reason="stop_loss"))
+        if take_profit is not None:
+            self._add_exit(position, Order(next(self._ids), exit_side, "limit", price + sign * take_profit, reason="take_profit"))
+        return position
+
+    def _add_exit(self, position: Position, order: Order):
+        order.position_id = position.id
+        position.exit_orders.append(order.id)
+        self.book.add(order)
+
+    def close_position(self, position_id: int, price: float, time, reason: str, row):
+        """Close a position and cancel its remaining exit orders"""
+        position = self.positions.pop(position_id)
+        for order_id in position.exit_orders:
+            self.book.cancel(order_id)
+
+        sign = 1 if position.side == "long" else -1
+        pnl = round(
+            (float((price - position.entry_price) * sign) * self.settings.account.leverage
+             - float(self.settings.account.commission)) * position.size,
+            2,
+        )
+        self.equity += pnl
+        drawdown, self.max_drawdown, self.peak_equity = update_iteration_data(
+            self.equity, self.peak_equity, self.max_drawdown
+        )
+        self.trades.append({
+            "trade_id": position.id,
+            "trading_date": row["trading_date"],
+            "side": position.side,
+            "position_size": position.size,
+            "entry_time": position.entry_time,
+            "exit_time": time,
+            "entry_price": position.entry_price,
+            "exit_price": price,
+            "trade_duration": (time - position.entry_time).total_seconds() / 60 + 5,
+            "exit_reason": reason,
+            "pnl": pnl,
+            "drawdown": drawdown,
+            "max_drawdown": self.max_drawdown,
+            "tag": position.tag,
+        })
+
+    def close_all(self, price: float, time, reason: str, row):
+        for position_id in list(self.positions):
+            self.close_position(position_id, price, time, reason, row)
+
+    def process_bar(self, i: int, row):
+        """Fill the orders bar i trades through"""
+        open_, high, low = row["open"], row["high"], row["low"]
+        for order in self.book.triggered(high, low, bullish=row["close"] >= open_):
+            if order.triggers_below:
+                price = min(open_, order.price)
+            else:
+                price = max(open_, order.price)
+
+            if order.position_id is None:
+                self.enter(order.side, price, row["timestamp"], i, row["trading_date"], order.size,
+                           order.stop_loss, order.take_profit, order.tag)
+            elif order.position_id in self.positions:
+                self.close_position(order.position_id, price, row["timestamp"], order.reason, row)
@@ -1,65 +1,38 @@
 from pandas import notna
-from app.services.backtest.core import BacktestEngine
+from app.services.backtest.core import BacktestEngine, run_strategy
 
 
-def previous_day_breakout(engine: BacktestEngine, df, enable_time_filter=False):
+def previous_day_breakout_bar(engine: BacktestEngine, rows: list, i: int, enable_time_filter=False):
+    """Evaluate bar i: manage the open trade, or enter on a close beyond the previous day's range"""
     settings = engine.settings
+    row, prev_row = rows[i], rows[i - 1]
 
-    for i in range(1, len(df)):
-        row, prev_row = df.iloc[i], df.iloc[i - 1]
-
-        # --- Exit conditions ---
-        if engine.current_trade:
-            side = engine.current_trade["side"]
-            entry_price = engine.current_trade["entry_price"]
+    # --- Exit conditions ---
+    if engine.current_trade:
+        engine.manage_open_trade(row, prev_row)
+        return
 
-            if side == "long":
-                if row["low"] <= entry_price - settings.strategy.stop_loss:
-                    engine.close_trade(entry_price - settings.strategy.stop_loss, row["timestamp"], "stop_loss", row)
-                    if settings.strategy.trade_until_win:
-                        engine.active_day = None
-                    continue
-                elif row["high"] >= entry_price + settings.strategy.take_profit:
-                    engine.close_trade(entry_price + settings.strategy.take_profit, row["timestamp"], "take_profit", row)
-                    if settings.strategy.trade_until_loss:
-                        engine.active_day = None
-                    continue
-            elif side == "short":
-                if row["high"] >= entry_price + settings.strategy.stop_loss:
-                    engine.close_trade(entry_price + settings.strategy.stop_loss, row["timestamp"], "stop_loss", row)
-                    if settings.strategy.trade_until_win:
-                        engine.active_day = None
-                    continue
-                elif row["low"] <= entry_price - settings.strategy.take_profit:
-                    engine.close_trade(entry_price - settings.strategy.take_profit, row["timestamp"], "take_profit", row)
-                    if settings.strategy.trade_until_loss:
-                        engine.active_day = None
-                    continue
+    # --- Entry conditions ---
+    if engine.active_day == row["trading_date"]:
+        return
 
-            if row["trading_date"] != prev_row["trading_date"]:
-                engine.close_trade(prev_row["close"], prev_row["timestamp"], "eod_close", row)
-                continue
+    if enable_time_filter:
+        bar_time = row["timestamp"].time()
+        if not (settings.strategy.trade_entry_start_time <= bar_time <= settings.strategy.trade_entry_end_time):
+            return
 
-        # --- Entry conditions ---
-        else:
-            if engine.active_day == row["trading_date"]:
-                continue
+    if notna(row["prev_day_high"]):
+        if row["close"] > row["prev_day_high"]:
+            next_bar = rows[i + 1] if i + 1 < len(rows) else None
+            if next_bar is not None:
+                engine.open_trade("long", next_bar["open"], next_bar["timestamp"], i + 1, row["trading_date"])
 
-            if enable_time_filter:
-                bar_time = row["timestamp"].time()
-                if not (settings.strategy.trade_entry_start_time <= bar_time <= settings.strategy.trade_entry_end_time):
-                    continue
+    if notna(row["prev_day_low"]):
+        if row["close"] < row["prev_day_low"]:
+            next_bar = rows[i + 1] if i + 1 < len(rows) else None
+            if next_bar is not None:
+                engine.open_trade("short", next_bar["open"], next_bar["timestamp"], i + 1, row["trading_date"])
 
-            if notna(row["prev_day_high"]):
-                if row["close"] > row["prev_day_high"]:
-                    next_bar = df.iloc[i + 1] if i + 1 < len(df) else None
-                    if next_bar is not None:
-                        engine.open_trade("long", next_bar["open"], next_bar["timestamp"], i + 1, row["trading_date"])
 
-            if notna(row["prev_day_low"]):
-                if row["close"] < row["prev_day_low"]:
-                    next_bar = df.iloc[i + 1] if i + 1 < len(df) else None
-                    if next_bar is not None:
-                        engine.open_trade("short", next_bar["open"], next_bar["timestamp"], i + 1, row["trading_date"])
-
-    return engine.trades
+def previous_day_breakout(engine: BacktestEngine, df, enable_time_filter=False):
+    return run_strategy(previous_day_breakout_bar, engine, df, enable_time_filter)
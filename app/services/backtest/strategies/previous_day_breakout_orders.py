@@ -0,0 +1,29 @@
+from pandas import notna
+from app.services.backtest.orders import PortfolioEngine
+from app.services.backtest.core import run_strategy
+
+
+def previous_day_breakout_orders_bar(engine: PortfolioEngine, rows: list, i: int, enable_time_filter=False):
+    """
+    Rest a buy stop at the previous day's high and a sell stop at its low, each bracketed
+    by the take profit and stop loss. Both breakouts can be open at once; anything still
+    open or resting at the end of the trading day is closed or cancelled. Orders rest
+    for the whole day, so the entry time filter does not apply.
+    """
+    settings = engine.settings
+    row, prev_row = rows[i], rows[i - 1]
+
+    if row["trading_date"] != prev_row["trading_date"]:
+        engine.close_all(prev_row["close"], prev_row["timestamp"], "eod_close", prev_row)
+        engine.cancel_entries()
+        bracket = {"stop_loss": settings.strategy.stop_loss, "take_profit": settings.strategy.take_profit}
+        if notna(row["prev_day_high"]):
+            engine.submit("long", "stop", row["prev_day_high"], tag="breakout_high", **bracket)
+        if notna(row["prev_day_low"]):
+            engine.submit("short", "stop", row["prev_day_low"], tag="breakout_low", **bracket)
+
+    engine.process_bar(i, row)
+
+
+def previous_day_breakout_orders(engine: PortfolioEngine, df, enable_time_filter=False):
+    return run_strategy(previous_day_breakout_orders_bar, engine, df, enable_time_filter)
@@ -0,0 +1,291 @@
+import os
+import json
+import shutil
+import asyncio
+import secrets
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from loguru import logger
+from pandas import DataFrame
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within the process
+    fcntl = None
+from app.config import CANDLE_CACHE_DIR, CANDLE_STORE_PRELOAD
+from app.db import db
+from app.services.candle_store import candle_store, CompactCandles
+
+# ticker and timeframe are constant per cache directory, so they are not stored in the files
+CANDLE_SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("us", tz="UTC")),
+    ("open", pa.float64()),
+    ("high", pa.float64()),
+    ("low", pa.float64()),
+    ("close", pa.float64()),
+    ("trading_date", pa.date32()),
+    ("ema20", pa.float64()),
+    ("prev_day_high", pa.float64()),
+    ("prev_day_low", pa.float64()),
+    ("prev2_day_high", pa.float64()),
+    ("prev2_day_low", pa.float64()),
+])
+CANDLE_COLUMNS = CANDLE_SCHEMA.names
+META_FILE = "_meta.json"
+# Bumped when the directory layout changes; caches written with another layout are rebuilt
+CACHE_LAYOUT = 2
+
+
+class ParquetCandleCache:
+    """
+    On-disk columnar cache of candles, one directory per (ticker, timeframe):
+
+        {root}/{ticker}/{timeframe}/2024-05.parquet   one partition per calendar month
+        {root}/{ticker}/{timeframe}/2024-05.arrow     the same month as uncompressed Arrow IPC
+        {root}/{ticker}/{timeframe}/_meta.json        newest cached timestamp and layout
+
+    Incremental refreshes only rewrite the months they touch, in both formats, so a sync
+    tick costs I/O for its own month rather than the whole history. Reads go through the
+    Arrow files, which are memory-mapped and decoded zero-copy.
+    The meta file only exists after a full rebuild, so appends never produce a cache with gaps.
+
+    Writers of a (ticker, timeframe) are serialized by a thread lock and an flock on
+    {root}/{ticker}/{timeframe}.lock, which also covers other worker processes. Rebuilds
+    are written to a temporary directory and swapped in, so readers see either the old
+    or the new cache, or briefly none (a cache miss).
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._locks: dict[tuple[str, str], threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _dir(self, ticker: str, timeframe: str) -> str:
+        return os.path.join(self.root, ticker.lower(), timeframe)
+
+    @contextmanager
+    def _lock(self, ticker: str, timeframe: str):
+        key = (ticker.lower(), timeframe)
+        with self._locks_guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            path = f"{self._dir(ticker, timeframe)}.lock"
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "a") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                yield
+
+    @staticmethod
+    def _read_meta(directory: str) -> dict | None:
+        path = os.path.join(directory, META_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            meta = json.load(f)
+        return meta if meta.get("layout") == CACHE_LAYOUT else None
+
+    @staticmethod
+    def _write_meta(directory: str, last_timestamp: datetime):
+        path = os.path.join(directory, META_FILE)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"last_timestamp": last_timestamp.isoformat(), "layout": CACHE_LAYOUT}, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _write_partitions(directory: str, df: DataFrame):
+        """Merge candles into their monthly partitions (new rows win on duplicate timestamps)"""
+        for month, month_df in df.groupby(df["timestamp"].dt.strftime("%Y-%m")):
+            path = os.path.join(directory, f"{month}.parquet")
+            if os.path.exists(path):
+                existing = pq.read_table(path).to_pandas()
+                month_df = pd.concat([existing, month_df], ignore_index=True)
+            month_df = (
+                month_df
+                .drop_duplicates(subset=["timestamp"], keep="last")
+                .sort_values("timestamp")
+            )
+            table = pa.Table.from_pandas(month_df, schema=CANDLE_SCHEMA, preserve_index=False)
+            tmp_path = f"{path}.tmp"
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, path)
+
+            arrow_path = os.path.join(directory, f"{month}.arrow")
+            tmp_path = f"{arrow_path}.tmp"
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, arrow_path)
+
+    def last_timestamp(self, ticker: str, timeframe: str) -> datetime | None:
+        """Newest cached candle timestamp, or None if the cache was never built"""
+        meta = self._read_meta(self._dir(ticker, timeframe))
+        if not meta:
+            return None
+        return datetime.fromisoformat(meta["last_timestamp"])
+
+    def load(self, ticker: str, timeframe: str) -> DataFrame | None:
+        """Load all cached candles in chronological order"""
+        directory = self._dir(ticker, timeframe)
+        if self._read_meta(directory) is None:
+            return None
+
+        try:
+            files = sorted(f for f in os.listdir(directory) if f.endswith(".arrow"))
+            tables = []
+            for f in files:
+                with pa.memory_map(os.path.join(directory, f)) as source:
+                    tables.append(pa.ipc.open_file(source).read_all())
+        except FileNotFoundError:
+            # Swapped out by a concurrent rebuild
+            return None
+        if not tables:
+            return None
+
+        df = pa.concat_tables(tables).to_pandas()
+        df.insert(0, "ticker", ticker)
+        df.insert(1, "timeframe", timeframe)
+        return df
+
+    def write(self, ticker: str, timeframe: str, df: DataFrame, replace: bool = False):
+        """
+        Write candles into the monthly partitions they belong to and their Arrow copies.
+        With replace=True the cache is rebuilt from df; otherwise rows are merged into
+        the existing partitions (new rows win on duplicate timestamps).
+        """
+        if df.empty:
+            return
+
+        df = self._normalize(df)
+        with self._lock(ticker, timeframe):
+            if replace:
+                self._rebuild(ticker, timeframe, df)
+            else:
+                self._merge(ticker, timeframe, df)
+
+    @staticmethod
+    def _normalize(df: DataFrame) -> DataFrame:
+        df = df[CANDLE_COLUMNS].copy()
+        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+        for col in CANDLE_COLUMNS:
+            if col not in ("timestamp", "trading_date"):
+                df[col] = df[col].astype("float64")
+        return df
+
+    def _rebuild(self, ticker: str, timeframe: str, df: DataFrame):
+        directory = self._dir(ticker, timeframe)
+        token = secrets.token_hex(4)
+        staging = f"{directory}.tmp-{token}"
+        os.makedirs(staging)
+        try:
+            self._write_partitions(staging, df)
+            self._write_meta(staging, df["timestamp"].max().to_pydatetime())
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        # A directory cannot be renamed over a non-empty one, so move the old cache aside first
+        retired = f"{directory}.old-{token}"
+        if os.path.exists(directory):
+            os.rename(directory, retired)
+        os.rename(staging, directory)
+        shutil.rmtree(retired, ignore_errors=True)
+
+    def _merge(self, ticker: str, timeframe: str, df: DataFrame):
+        directory = self._dir(ticker, timeframe)
+        os.makedirs(directory, exist_ok=True)
+        self._write_partitions(directory, df)
+
+        last_ts = df["timestamp"].max().to_pydatetime()
+        cached_last = self.last_timestamp(ticker, timeframe)
+        if cached_last is None or last_ts > cached_last:
+            self._write_meta(directory, last_ts)
+
+    def append(self, ticker: str, timeframe: str, df: DataFrame):
+        """Merge freshly synced candles into an existing cache (no-op until the first full build)"""
+        if df.empty:
+            return
+
+        df = self._normalize(df)
+        with self._lock(ticker, timeframe):
+            # Checked under the lock, so a concurrent rebuild cannot drop the appended months
+            if self._read_meta(self._dir(ticker, timeframe)) is None:
+                return
+            self._merge(ticker, timeframe, df)
+
+
+candle_cache = ParquetCandleCache(CANDLE_CACHE_DIR)
+
+
+async def fresh_candles(ticker: str, timeframe: str) -> CompactCandles | None:
+    """
+    The in-memory history of a (ticker, timeframe), caught up with the database, or None
+    when it is not resident. Candles written by another worker's sync job are fetched
+    from the newest resident candle on, so the possibly revised last bar is patched too.
+    """
+    candles = candle_store.get(ticker, timeframe)
+    if candles is None or not len(candles):
+        return None
+
+    db_last = await db.get_last_candle_timestamp(ticker, timeframe)
+    if db_last is not None and db_last > candles.last_timestamp:
+        rows = await db.fetch_candles_since(ticker, timeframe, candles.last_timestamp.to_pydatetime())
+        candle_store.merge(ticker, timeframe, DataFrame(rows))
+    return candles
+
+
+async def load_candles(ticker: str, timeframe: str) -> DataFrame:
+    """
+    Load the full candle history for a (ticker, timeframe). Served from the in-memory
+    candle store when resident, then from the Parquet cache when it is up to date with
+    the database, and rebuilt from the database otherwise.
+    """
+    candles = await fresh_candles(ticker, timeframe)
+    if candles is not None:
+        return candles.to_dataframe()
+
+    db_last = await db.get_last_candle_timestamp(ticker, timeframe)
+    if db_last is None:
+        return DataFrame()
+
+    cached_last = candle_cache.last_timestamp(ticker, timeframe)
+    if cached_last is not None and cached_last >= db_last:
+        df = await asyncio.to_thread(candle_cache.load, ticker, timeframe)
+        if df is not None:
+            logger.debug(f"Loaded {len(df)} candles for {ticker} | {timeframe} from cache")
+            candle_store.put(ticker, timeframe, df)
+            return df
+
+    logger.info(f"Candle cache for {ticker} | {timeframe} is stale, loading from DB")
+    data = await db.fetch_market_snapshot_by_ticker_by_timeframe(ticker, timeframe)
+    df = DataFrame(data)
+    if not df.empty:
+        candle_store.put(ticker, timeframe, df)
+        try:
+            await asyncio.to_thread(candle_cache.write, ticker, timeframe, df, True)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to rebuild candle cache for {ticker} | {timeframe}: {e}")
+    return df
+
+
+async def load_recent_candles(ticker: str, timeframe: str, limit: int = 1000) -> DataFrame:
+    """The newest `limit` candles in chronological order, like db.get_recent_candles"""
+    candles = await fresh_candles(ticker, timeframe)
+    if candles is None:
+        return await db.get_recent_candles(ticker, timeframe, limit)
+    return candles.to_dataframe(max(0, len(candles) - limit))
+
+
+async def warm_candle_store():
+    """Load the CANDLE_STORE_PRELOAD histories into memory"""
+    for pair in filter(None, (p.strip() for p in CANDLE_STORE_PRELOAD.split(","))):
+        ticker, _, timeframe = pair.partition(":")
+        try:
+            df = await load_candles(ticker, timeframe)
+            logger.info(f"🔥 Candle store warmed with {len(df)} {ticker} | {timeframe} candles")
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to warm candle store for {ticker} | {timeframe}: {e}")
@@ -0,0 +1,191 @@
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from loguru import logger
+from pandas import DataFrame
+from app.config import CANDLE_STORE_MAX_BYTES, CANDLE_STORE_PRICE_DTYPE
+from app.db import CANDLE_COLUMNS
+
+PRICE_COLUMNS = [c for c in CANDLE_COLUMNS if c not in ("ticker", "timeframe", "timestamp", "trading_date")]
+
+
+def _epoch_us(timestamps) -> np.ndarray:
+    index = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True))
+    return index.as_unit("us").asi8
+
+
+def _day_codes(trading_dates) -> np.ndarray:
+    return pd.to_datetime(pd.Series(trading_dates)).to_numpy(dtype="datetime64[D]").astype("int64").astype("int32")
+
+
+def _nullable(values: np.ndarray) -> list:
+    """Float values as a list with None where the database has NULL"""
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+class CompactCandles:
+    """
+    One (ticker, timeframe) history as typed arrays in chronological order: int64 epoch-us
+    timestamps, int32 trading day codes (days since 1970-01-01) and one price array per
+    candle column. Arrays are over-allocated so the sync job's appends are amortized O(1).
+    """
+
+    def __init__(self, ticker: str, timeframe: str, price_dtype: str = CANDLE_STORE_PRICE_DTYPE):
+        self.ticker = ticker
+        self.timeframe = timeframe
+        self.price_dtype = np.dtype(price_dtype)
+        self.length = 0
+        self._timestamps = np.empty(0, dtype="int64")
+        self._days = np.empty(0, dtype="int32")
+        self._prices = {col: np.empty(0, dtype=self.price_dtype) for col in PRICE_COLUMNS}
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[:self.length]
+
+    @property
+    def trading_days(self) -> np.ndarray:
+        return self._days[:self.length]
+
+    def prices(self, col: str) -> np.ndarray:
+        return self._prices[col][:self.length]
+
+    @property
+    def nbytes(self) -> int:
+        return self._timestamps.nbytes + self._days.nbytes + sum(a.nbytes for a in self._prices.values())
+
+    @property
+    def last_timestamp(self) -> pd.Timestamp | None:
+        return pd.Timestamp(int(self.timestamps[-1]), unit="us", tz="UTC") if self.length else None
+
+    def _reserve(self, capacity: int):
+        if capacity <= len(self._timestamps):
+            return
+        capacity = max(capacity, int(len(self._timestamps) * 1.25) + 1024)
+        self._timestamps = np.resize(self._timestamps, capacity)
+        self._days = np.resize(self._days, capacity)
+        self._prices = {col: np.resize(a, capacity) for col, a in self._prices.items()}
+
+    def _write(self, at: int, df: DataFrame):
+        end = at + len(df)
+        self._reserve(end)
+        self._timestamps[at:end] = _epoch_us(df["timestamp"])
+        self._days[at:end] = _day_codes(df["trading_date"])
+        for col in PRICE_COLUMNS:
+            self._prices[col][at:end] = pd.to_numeric(df[col]).to_numpy(dtype=self.price_dtype, na_value=np.nan)
+        self.length = end
+
+    def merge(self, df: DataFrame):
+        """
+        Apply freshly upserted candles (CANDLE_COLUMNS, any order). Candles that replace and
+        extend the tail, which is what the sync job writes, are patched in place; anything else
+        (a backfill in the middle of the history) rebuilds the arrays.
+        """
+        if df.empty:
+            return
+        df = df.sort_values("timestamp").drop_duplicates(subset=["timestamp"], keep="last")
+        new_timestamps = _epoch_us(df["timestamp"])
+        start = int(np.searchsorted(self.timestamps, new_timestamps[0]))
+        if np.isin(self.timestamps[start:], new_timestamps).all():
+            self._write(start, df)
+            return
+
+        merged = pd.concat([self.to_dataframe(), df[CANDLE_COLUMNS]], ignore_index=True)
+        merged["timestamp"] = pd.to_datetime(merged["timestamp"], utc=True)
+        merged = merged.drop_duplicates(subset=["timestamp"], keep="last").sort_values("timestamp")
+        self.length = 0
+        self._write(0, merged)
+
+    def day_bounds(self, trading_date) -> tuple[int, int]:
+        """Index range of one trading day's candles"""
+        day = int(_day_codes([trading_date])[0])
+        days = self.trading_days
+        return int(np.searchsorted(days, day, "left")), int(np.searchsorted(days, day, "right"))
+
+    def to_dataframe(self, start: int = 0, end: int | None = None) -> DataFrame:
+        """Candles [start:end] as a DataFrame shaped like the market_snapshot rows load_candles returns"""
+        end = self.length if end is None else end
+        days = self.trading_days[start:end]
+        if len(days):
+            first = int(days.min())
+            calendar = np.arange(first, int(days.max()) + 1).astype("datetime64[D]").astype(object)
+            trading_dates = calendar[days - first]
+        else:
+            trading_dates = np.empty(0, dtype=object)
+        df = DataFrame({
+            "ticker": self.ticker,
+            "timeframe": self.timeframe,
+            "timestamp": pd.to_datetime(self.timestamps[start:end], unit="us", utc=True),
+            "trading_date": trading_dates,
+            **{col: self.prices(col)[start:end].astype("float64") for col in PRICE_COLUMNS},
+        }, index=pd.RangeIndex(end - start))
+        return df[CANDLE_COLUMNS]
+
+    def to_columns(self, start: int, end: int, names: list[str]) -> dict[str, list]:
+        """Candles [start:end] as JSON-ready columns, with the values asyncpg would have returned"""
+        days = self.trading_days[start:end]
+        values = {
+            "ticker": [self.ticker] * (end - start),
+            "timeframe": [self.timeframe] * (end - start),
+            "timestamp": list(pd.to_datetime(self.timestamps[start:end], unit="us", utc=True).to_pydatetime()),
+            "trading_date": days.astype("datetime64[D]").astype(object).tolist(),
+        }
+        return {
+            name: values[name] if name in values else _nullable(self.prices(name)[start:end].astype("float64"))
+            for name in names
+        }
+
+
+class CandleStore:
+    """
+    Process-wide LRU of CompactCandles keyed by (ticker, timeframe), bounded by the total
+    size of their arrays. The least recently read histories are evicted first; the one
+    being inserted always stays, even when it alone exceeds the budget.
+    """
+
+    def __init__(self, max_bytes: int = CANDLE_STORE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[tuple[str, str], CompactCandles] = OrderedDict()
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return key in self._entries
+
+    @property
+    def nbytes(self) -> int:
+        return sum(c.nbytes for c in self._entries.values())
+
+    def get(self, ticker: str, timeframe: str) -> CompactCandles | None:
+        candles = self._entries.get((ticker, timeframe))
+        if candles is not None:
+            self._entries.move_to_end((ticker, timeframe))
+        return candles
+
+    def put(self, ticker: str, timeframe: str, df: DataFrame) -> CompactCandles:
+        """Replace a history with the given full candle DataFrame"""
+        candles = CompactCandles(ticker, timeframe)
+        candles.merge(df)
+        self._entries[(ticker, timeframe)] = candles
+        self._entries.move_to_end((ticker, timeframe))
+        self._evict()
+        return candles
+
+    def merge(self, ticker: str, timeframe: str, df: DataFrame):
+        """Patch a resident history with upserted candles (no-op when it is not resident)"""
+        candles = self._entries.get((ticker, timeframe))
+        if candles is not None:
+            candles.merge(df)
+            self._evict()
+
+    def discard(self, ticker: str, timeframe: str):
+        self._entries.pop((ticker, timeframe), None)
+
+    def _evict(self):
+        while len(self._entries) > 1 and self.nbytes > self.max_bytes:
+            (ticker, timeframe), candles = self._entries.popitem(last=False)
+            logger.info(f"Evicted {ticker} | {timeframe} from the candle store ({candles.nbytes / 1e6:.1f} MB)")
+
+
+candle_store = CandleStore()
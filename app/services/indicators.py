@@ -0,0 +1,290 @@
+import re
+import asyncio
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from app.cache import indicator_cache
+from app.db import db
+from app.services.candle_cache import load_candles
+
+INDICATOR_SPEC = re.compile(r"^(?P<name>[a-z]+)(?P<period>\d+)?$")
+MAX_INDICATOR_PERIOD = 1000
+
+# The sync job re-upserts candles from the previous newest timestamp, so the newest
+# cached bar may have been revised; everything before it is treated as final.
+REVISED_BARS = 1
+
+# name -> (compute function, default period). A compute function gets the full input
+# arrays, the index of the first bar to compute and the outputs already computed for
+# the bars before it (None when computing from scratch), and returns outputs for
+# bars [start:]. Output "" is named after the spec itself (e.g. "ema50"), other outputs
+# are suffixed ("bb20_upper"); outputs starting with "_" are internal state.
+INDICATORS: dict[str, tuple] = {}
+
+
+def register(name: str, default_period: int):
+    def decorator(fn):
+        INDICATORS[name] = (fn, default_period)
+        return fn
+    return decorator
+
+
+def _ewm(values: np.ndarray, alpha: float, seed: float | None) -> np.ndarray:
+    """Exponential moving average (adjust=False), continuing from `seed` when given"""
+    if seed is not None:
+        values = np.concatenate([[seed], values])
+    out = pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return out[1:] if seed is not None else out
+
+
+def _rolling(values: np.ndarray, start: int, period: int, reducer: str) -> np.ndarray:
+    """Rolling window aggregate for bars [start:], reading back only as far as the window needs"""
+    lo = max(0, start - period + 1)
+    rolled = getattr(pd.Series(values[lo:]).rolling(period), reducer)()
+    return rolled.to_numpy()[start - lo:]
+
+
+@register("ema", 20)
+def ema(inputs: dict, start: int, prev: dict | None, period: int) -> dict:
+    seed = prev[""][start - 1] if prev else None
+    return {"": _ewm(inputs["close"][start:], 2 / (period + 1), seed)}
+
+
+@register("sma", 20)
+def sma(inputs: dict, start: int, prev: dict | None, period: int) -> dict:
+    return {"": _rolling(inputs["close"], start, period, "mean")}
+
+
+@register("bb", 20)
+def bollinger(inputs: dict, start: int, prev: dict | None, period: int) -> dict:
+    """Bollinger bands at 2 population standard deviations"""
+    lo = max(0, start - period + 1)
+    window = pd.Series(inputs["close"][lo:]).rolling(period)
+    mid = window.mean().to_numpy()[start - lo:]
+    std = window.std(ddof=0).to_numpy()[start - lo:]
+    return {"mid": mid, "upper": mid + 2 * std, "lower": mid - 2 * std}
+
+
+@register("range", 20)
+def rolling_range(inputs: dict, start: int, prev: dict | None, period: int) -> dict:
+    """Highest high minus lowest low over the window"""
+    return {"": _rolling(inputs["high"], start, period, "max") - _rolling(inputs["low"], start, period, "min")}
+
+
+@register("atr", 14)
+def atr(inputs: dict, start: int, prev: dict | None, period: int) -> dict:
+    """Average true range with Wilder smoothing"""
+    high, low = inputs["high"][start:], inputs["low"][start:]
+    prev_close = np.concatenate([[inputs["close"][start - 1] if start else np.nan], inputs["close"][start:-1]])
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    seed = prev[""][start - 1] if prev else None
+    return {"": _ewm(true_range, 1 / period, seed)}
+
+
+@register("rsi", 14)
+def rsi(inputs: dict, start: int, prev: dict | None, period: int) -> dict:
+    """Relative strength index with Wilder smoothing"""
+    close = inputs["close"]
+    prev_close = np.concatenate([[close[start - 1] if start else close[0]], close[start:-1]])
+    delta = close[start:] - prev_close
+    avg_gain = _ewm(np.maximum(delta, 0), 1 / period, prev["_gain"][start - 1] if prev else None)
+    avg_loss = _ewm(np.maximum(-delta, 0), 1 / period, prev["_loss"][start - 1] if prev else None)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = np.where(avg_loss == 0, 100.0, 100 - 100 / (1 + avg_gain / avg_loss))
+    return {"": value, "_gain": avg_gain, "_loss": avg_loss}
+
+
+def parse_indicators(specs: str | list[str] | None) -> list[str]:
+    """
+    Normalize "ema50,atr14" (or a list of specs) into validated spec names.
+    A spec without a period uses the indicator's default, e.g. "rsi" -> "rsi14".
+    Raises ValueError on unknown indicators or invalid periods.
+    """
+    if not specs:
+        return []
+    if isinstance(specs, str):
+        specs = specs.split(",")
+
+    names = []
+    for spec in specs:
+        spec = spec.strip().lower()
+        match = INDICATOR_SPEC.match(spec)
+        if not match or match["name"] not in INDICATORS:
+            raise ValueError(f"Unknown indicator '{spec}'. Available: {', '.join(sorted(INDICATORS))}")
+        period = int(match["period"]) if match["period"] else INDICATORS[match["name"]][1]
+        if not 1 <= period <= MAX_INDICATOR_PERIOD:
+            raise ValueError(f"Indicator period must be between 1 and {MAX_INDICATOR_PERIOD}, got '{spec}'")
+        name = f"{match['name']}{period}"
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def to_epoch_us(timestamps) -> np.ndarray:
+    """UTC epoch microseconds of a timestamp column or list (naive timestamps are taken as UTC)"""
+    index = pd.DatetimeIndex(timestamps)
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    if index.unit != "us":
+        index = index.as_unit("us")
+    return index.asi8
+
+
+def candle_inputs(df: DataFrame) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """Epoch-us timestamps and float64 OHLC arrays of a candle DataFrame"""
+    timestamps = to_epoch_us(df["timestamp"])
+    return timestamps, {col: df[col].to_numpy(dtype="float64") for col in ("open", "high", "low", "close")}
+
+
+class IndicatorSeries:
+    """One indicator's outputs over the full candle history of a (ticker, timeframe)"""
+
+    def __init__(self, name: str, timestamps: np.ndarray, values: dict[str, np.ndarray]):
+        self.name = name
+        self.timestamps = timestamps
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + sum(v.nbytes for v in self.values.values())
+
+    @property
+    def columns(self) -> dict[str, np.ndarray]:
+        """Public outputs keyed by column name"""
+        return {
+            self.name if key == "" else f"{self.name}_{key}": values
+            for key, values in self.values.items()
+            if not key.startswith("_")
+        }
+
+    def align(self, timestamps: np.ndarray) -> dict[str, np.ndarray]:
+        """Values at the given epoch-us timestamps, NaN where a timestamp is not in the series"""
+        idx = np.searchsorted(self.timestamps, timestamps).clip(0, max(len(self) - 1, 0))
+        found = (self.timestamps[idx] == timestamps) if len(self) else np.zeros(len(timestamps), bool)
+        return {name: np.where(found, values[idx], np.nan) for name, values in self.columns.items()}
+
+
+def compute_indicator(
+    name: str,
+    timestamps: np.ndarray,
+    inputs: dict[str, np.ndarray],
+    cached: IndicatorSeries | None = None
+) -> IndicatorSeries:
+    """
+    Compute an indicator over chronologically sorted candles (see candle_inputs). When `cached`
+    covers a prefix of them, only the bars after it (plus the possibly revised newest cached bar)
+    are computed.
+    """
+    match = INDICATOR_SPEC.match(name)
+    fn, _ = INDICATORS[match["name"]]
+    period = int(match["period"])
+
+    start, prev = 0, None
+    if cached is not None and len(cached) > REVISED_BARS:
+        keep = len(cached) - REVISED_BARS
+        if keep <= len(timestamps) and timestamps[keep - 1] == cached.timestamps[keep - 1]:
+            start, prev = keep, cached.values
+
+    computed = fn(inputs, start, prev, period)
+    if prev is not None:
+        computed = {key: np.concatenate([prev[key][:start], values]) for key, values in computed.items()}
+    return IndicatorSeries(name, timestamps, computed)
+
+
+def refresh_indicators(
+    df: DataFrame,
+    names: list[str],
+    cached: dict[str, IndicatorSeries | None]
+) -> dict[str, IndicatorSeries]:
+    """Bring indicator series up to date with `df` (the full history), reusing the given cached series"""
+    timestamps, inputs = candle_inputs(df)
+    series = {}
+    for name in names:
+        current = cached.get(name)
+        if current is None or len(current) != len(timestamps) or current.timestamps[-1] != timestamps[-1]:
+            current = compute_indicator(name, timestamps, inputs, current)
+        series[name] = current
+    return series
+
+
+def _cached_indicators(ticker: str, timeframe: str, names: list[str]) -> dict[str, IndicatorSeries | None]:
+    return {name: indicator_cache.get((ticker, timeframe, name)) for name in names}
+
+
+def _store_indicators(ticker: str, timeframe: str, cached: dict, series: dict[str, IndicatorSeries]):
+    for name, current in series.items():
+        if current is not cached[name]:
+            indicator_cache.set((ticker, timeframe, name), current)
+
+
+def update_indicators(ticker: str, timeframe: str, df: DataFrame, names: list[str]) -> dict[str, IndicatorSeries]:
+    """refresh_indicators against indicator_cache; not for worker threads (the cache is not thread-safe)"""
+    cached = _cached_indicators(ticker, timeframe, names)
+    series = refresh_indicators(df, names, cached)
+    _store_indicators(ticker, timeframe, cached, series)
+    return series
+
+
+async def load_indicators(ticker: str, timeframe: str, names: list[str]) -> dict[str, IndicatorSeries]:
+    """
+    Indicators over the full candle history. Served from the cache when it reaches the newest
+    candle in the database; otherwise the history is loaded and the cached series are extended
+    off the event loop. A revision of the newest bar is picked up when the next bar arrives.
+    """
+    db_last = await db.get_last_candle_timestamp(ticker, timeframe)
+    if db_last is None:
+        return {}
+
+    cached = _cached_indicators(ticker, timeframe, names)
+    db_last_us = to_epoch_us([db_last])[0]
+    if all(s is not None and len(s) and s.timestamps[-1] >= db_last_us for s in cached.values()):
+        return cached
+
+    df = await load_candles(ticker, timeframe)
+    if df.empty:
+        return {}
+    series = await asyncio.to_thread(refresh_indicators, df, names, cached)
+    _store_indicators(ticker, timeframe, cached, series)
+    return series
+
+
+def indicator_columns(series: dict[str, IndicatorSeries], timestamps) -> dict[str, list]:
+    """Indicator values at the given timestamps as JSON-ready columns (None where undefined)"""
+    timestamps = to_epoch_us(timestamps)
+    columns = {}
+    for indicator in series.values():
+        for name, values in indicator.align(timestamps).items():
+            columns[name] = np.where(np.isnan(values), None, values).tolist()
+    return columns
+
+
+def with_indicator_columns(df: DataFrame, series: dict[str, IndicatorSeries]) -> DataFrame:
+    """A copy of a full-history candle DataFrame with the series' columns, for strategies to read per bar"""
+    df = df.copy()
+    for indicator in series.values():
+        for column, values in indicator.columns.items():
+            df[column] = values
+    return df
+
+
+def add_indicator_columns(ticker: str, timeframe: str, df: DataFrame, names: list[str]) -> DataFrame:
+    """Attach indicator columns to a full-history candle DataFrame, for strategies to read per bar"""
+    if not names:
+        return df
+    return with_indicator_columns(df, update_indicators(ticker, timeframe, df, names))
+
+
+async def load_indicator_columns(ticker: str, timeframe: str, df: DataFrame, names: list[str]) -> DataFrame:
+    """
+    add_indicator_columns for the event loop: the cache is read and written here, like
+    load_indicators does, and only the computation and the copy run in a worker thread.
+    """
+    if not names:
+        return df
+    cached = _cached_indicators(ticker, timeframe, names)
+    series = await asyncio.to_thread(refresh_indicators, df, names, cached)
+    _store_indicators(ticker, timeframe, cached, series)
+    return await asyncio.to_thread(with_indicator_columns, df, series)
@@ -0,0 +1,111 @@
+import asyncio
+import asyncpg
+from loguru import logger
+from app.config import DATABASE_URL, SCHEDULER_LOCK_NAME, LEADER_POLL_SECONDS
+from app.services.scheduler import SchedulerService, scheduler_service
+
+
+class SchedulerLeader:
+    """
+    Runs the scheduler in exactly one worker process, elected through a Postgres
+    session-level advisory lock.
+
+    Every worker polls pg_try_advisory_lock on its own dedicated connection (pooled
+    connections release advisory locks when they are returned to the pool). The worker
+    that gets the lock starts the scheduler; the others keep polling. When the leader
+    dies or loses its connection, Postgres drops the lock and the next poll of another
+    worker takes over. A leader that notices it lost the lock pauses its scheduler and
+    cancels the runs in progress, since pausing alone only stops future triggers. The
+    loss is noticed at the next poll, so two workers can sync at the same time for up
+    to about one poll interval.
+    """
+
+    def __init__(self, scheduler: SchedulerService, lock_name: str, poll_seconds: float):
+        self.scheduler = scheduler
+        self.lock_name = lock_name
+        self.poll_seconds = poll_seconds
+        self.is_leader = False
+        self._conn: asyncpg.Connection | None = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        """Start competing for leadership in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop competing, pause the scheduler and release the lock"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self.scheduler.is_running:
+            self.scheduler.stop()
+        self.is_leader = False
+
+        if self._conn is not None and not self._conn.is_closed():
+            # Closing the session releases the advisory lock
+            await self._conn.close()
+        self._conn = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self._poll()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Scheduler leader election check failed: {e}")
+                self._demote()
+                await self._close_connection()
+            await asyncio.sleep(self.poll_seconds)
+
+    async def _poll(self):
+        if self._conn is None or self._conn.is_closed():
+            # A closed session has already lost any lock it held
+            self._demote()
+            self._conn = await asyncpg.connect(DATABASE_URL)
+
+        if self.is_leader:
+            # Keep-alive: fails fast if the session holding the lock is gone
+            await self._conn.fetchval("SELECT 1", timeout=self.poll_seconds)
+            return
+
+        acquired = await self._conn.fetchval(
+            "SELECT pg_try_advisory_lock(hashtext($1))", self.lock_name, timeout=self.poll_seconds
+        )
+        if acquired:
+            self._elect()
+
+    def _elect(self):
+        self.is_leader = True
+        logger.info(f"👑 Acquired scheduler lock '{self.lock_name}', starting jobs in this worker")
+        if self.scheduler.is_running:
+            self.scheduler.resume()
+        else:
+            self.scheduler.start()
+
+    def _demote(self):
+        if not self.is_leader:
+            return
+        self.is_leader = False
+        logger.warning(f"⚠️ Lost scheduler lock '{self.lock_name}', pausing jobs in this worker")
+        self.scheduler.pause()
+        cancelled = self.scheduler.cancel_running()
+        if cancelled:
+            logger.warning(f"⚠️ Cancelled {cancelled} job run(s) in progress")
+
+    async def _close_connection(self):
+        if self._conn is not None:
+            try:
+                await self._conn.close(timeout=self.poll_seconds)
+            except Exception:
+                self._conn.terminate()
+            self._conn = None
+
+
+scheduler_leader = SchedulerLeader(scheduler_service, SCHEDULER_LOCK_NAME, LEADER_POLL_SECONDS)
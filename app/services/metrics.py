@@ -0,0 +1,169 @@
+import time
+import functools
+from pandas import DataFrame
+from prometheus_client import Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+ROW_BUCKETS = (0, 1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+# --- HTTP ---
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status code",
+    ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route"], buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being served", ["method"]
+)
+
+# --- Database ---
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds", "DatabaseManager call latency, including pool wait",
+    ["query"], buckets=LATENCY_BUCKETS
+)
+DB_QUERY_ROWS = Histogram(
+    "db_query_rows", "Rows returned per DatabaseManager call", ["query"], buckets=ROW_BUCKETS
+)
+DB_QUERY_ERRORS = Counter("db_query_errors_total", "DatabaseManager calls that raised", ["query"])
+DB_POOL_WAITERS = Gauge("db_pool_waiters", "Coroutines waiting to acquire a pool connection")
+DB_POOL_WAIT = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting to acquire a pool connection", buckets=LATENCY_BUCKETS
+)
+
+# --- Backtests ---
+BACKTEST_RUNS = Counter("backtest_runs_total", "Backtest engine runs", ["strategy"])
+BACKTEST_BARS = Counter("backtest_bars_processed_total", "Bars fed through the backtest engine", ["strategy"])
+BACKTEST_TRADES = Counter("backtest_trades_total", "Trades produced by the backtest engine", ["strategy"])
+BACKTEST_DURATION = Histogram(
+    "backtest_duration_seconds", "Backtest engine runtime", ["strategy"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+
+# --- Request coalescing ---
+SINGLEFLIGHT_CALLS = Counter(
+    "singleflight_calls_total",
+    "Coalesced operation calls: executed ran the computation, coalesced shared one already in flight",
+    ["operation", "result"]
+)
+
+
+def observe_query(func):
+    """Record latency, row count and errors of a DatabaseManager coroutine, labelled by method name"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            DB_QUERY_ERRORS.labels(name).inc()
+            raise
+        finally:
+            DB_QUERY_DURATION.labels(name).observe(time.perf_counter() - start)
+
+        if isinstance(result, (list, DataFrame)):
+            DB_QUERY_ROWS.labels(name).observe(len(result))
+        return result
+
+    return wrapper
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency, status counts and in-flight requests.
+    Routes are labelled by their path template (e.g. /trades/{trade_id}) to keep cardinality bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_progress.dec()
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.labels(method, route_path).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route_path, str(status_code)).inc()
+
+
+class DatabasePoolCollector:
+    """Exports asyncpg pool size and idle connections at scrape time"""
+
+    def __init__(self, db):
+        self.db = db
+
+    def collect(self):
+        size = GaugeMetricFamily("db_pool_size", "Open connections in the pool")
+        idle = GaugeMetricFamily("db_pool_idle", "Idle connections in the pool")
+        max_size = GaugeMetricFamily("db_pool_max_size", "Maximum connections in the pool")
+        pool = self.db._pool
+        if pool is not None:
+            size.add_metric([], pool.get_size())
+            idle.add_metric([], pool.get_idle_size())
+            max_size.add_metric([], pool.get_max_size())
+        yield size
+        yield idle
+        yield max_size
+
+
+class JobStatsCollector:
+    """Exports the scheduler's per-job JobStats at scrape time"""
+
+    def __init__(self, scheduler_service):
+        self.scheduler_service = scheduler_service
+
+    def collect(self):
+        labels = ["job"]
+        runs = CounterMetricFamily("scheduler_job_runs", "Completed job runs", labels=labels)
+        failures = CounterMetricFamily("scheduler_job_failures", "Failed job runs", labels=labels)
+        skipped = CounterMetricFamily(
+            "scheduler_job_skipped", "Runs skipped because the previous run was still in progress", labels=labels
+        )
+        coalesced = CounterMetricFamily("scheduler_job_coalesced", "Run times merged into a single run", labels=labels)
+        missed = CounterMetricFamily("scheduler_job_missed", "Run times dropped after the misfire grace time", labels=labels)
+        running = GaugeMetricFamily("scheduler_job_running", "Whether the job is currently running", labels=labels)
+        data_lag = GaugeMetricFamily(
+            "scheduler_job_data_lag_seconds", "Age of the newest candle seen by the job", labels=labels
+        )
+        duration = HistogramMetricFamily("scheduler_job_duration_seconds", "Job run duration", labels=labels)
+
+        for job_id, stats in self.scheduler_service.job_stats.items():
+            runs.add_metric([job_id], stats.runs)
+            failures.add_metric([job_id], stats.failures)
+            skipped.add_metric([job_id], stats.skipped)
+            coalesced.add_metric([job_id], stats.coalesced)
+            missed.add_metric([job_id], stats.missed)
+            running.add_metric([job_id], int(stats.running))
+            lag = stats.data_lag_seconds()
+            if lag is not None:
+                data_lag.add_metric([job_id], lag)
+            duration.add_metric(
+                [job_id],
+                buckets=list(stats.duration_histogram().items()),
+                sum_value=stats.duration_sum
+            )
+
+        yield from (runs, failures, skipped, coalesced, missed, running, data_lag, duration)
@@ -0,0 +1,137 @@
+import os
+import time
+import uuid
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from urllib.parse import parse_qs
+from loguru import logger
+from pyinstrument import Profiler
+from pyinstrument.renderers import SpeedscopeRenderer
+from starlette.responses import JSONResponse
+from app.config import PROFILE_DIR
+from app.services.auth.utils import decode_access_token
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_SUFFIX = ".speedscope.json"
+PROFILE_ID_PATTERN = r"^\d{8}T\d{6}-[0-9a-f]{8}$"
+
+# Stage timings (milliseconds) of the request being profiled; None when profiling is off
+_stage_timings: ContextVar[dict[str, float] | None] = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time a pipeline stage of the current request, if it is being profiled. Stages inside
+    a coalesced computation are reported to every request that awaited it.
+    """
+    timings = _stage_timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def collect_stages() -> dict[str, float]:
+    """
+    Collect stage timings in a context of their own, for work shared by several requests
+    (see SingleFlight), whatever the request that started it. Returns the dict they go to.
+    """
+    timings = {}
+    _stage_timings.set(timings)
+    return timings
+
+
+def add_stages(timings: dict[str, float]):
+    """Add stage timings collected elsewhere to the current request's, if it is being profiled"""
+    current = _stage_timings.get()
+    if current is None:
+        return
+    for name, ms in timings.items():
+        current[name] = current.get(name, 0.0) + ms
+
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(PROFILE_DIR, f"{profile_id}{PROFILE_SUFFIX}")
+
+
+def _profile_requested(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER.lower().encode():
+            return value not in (b"", b"0", b"false")
+    if b"profile" not in scope["query_string"]:
+        return False
+    values = parse_qs(scope["query_string"].decode()).get("profile")
+    return bool(values) and values[-1] not in ("", "0", "false")
+
+
+def _is_authenticated(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode().partition(" ")
+            return scheme.lower() == "bearer" and decode_access_token(token) is not None
+    return False
+
+
+def _write_profile(profile_id: str, profiler: Profiler):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(profile_path(profile_id), "w") as f:
+        f.write(profiler.output(SpeedscopeRenderer()))
+
+
+class ProfilingMiddleware:
+    """
+    Runs a single request under a sampling profiler when it carries an `X-Profile: 1`
+    header or a `?profile=1` query flag and a valid access token.
+
+    The speedscope profile is written to PROFILE_DIR and its id returned in the
+    X-Profile-Id header (fetch it from /profiles/{id}); pipeline stage timings are
+    returned in a Server-Timing header. Requests without the flag pass straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not _is_authenticated(scope):
+            response = JSONResponse({"detail": "Profiling requires a valid access token"}, status_code=401)
+            await response(scope, receive, send)
+            return
+
+        profile_id = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        timings = {}
+        token = _stage_timings.set(timings)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((PROFILE_ID_HEADER.lower().encode(), profile_id.encode()))
+                if timings:
+                    server_timing = ", ".join(f"{name};dur={ms:.1f}" for name, ms in timings.items())
+                    headers.append((b"server-timing", server_timing.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            _stage_timings.reset(token)
+            logger.info(f"🔬 Profiled {scope['method']} {scope['path']} as {profile_id}: {timings}")
+            try:
+                await asyncio.to_thread(_write_profile, profile_id, profiler)
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to write profile {profile_id}: {e}")
@@ -0,0 +1,186 @@
+import json
+import asyncio
+import secrets
+from datetime import datetime
+import asyncpg
+from loguru import logger
+from pandas import DataFrame
+from app.config import DATABASE_URL, STREAM_CLIENT_QUEUE_SIZE, STREAM_NOTIFY_CHANNEL, LEADER_POLL_SECONDS
+from app.db import db
+from app.responses import dumps
+
+STREAM_COLUMNS = [
+    "timestamp", "open", "high", "low", "close", "trading_date",
+    "ema20", "prev_day_high", "prev_day_low", "prev2_day_high", "prev2_day_low"
+]
+
+# Postgres rejects NOTIFY payloads of 8000 bytes or more
+NOTIFY_PAYLOAD_LIMIT = 7900
+
+
+def candle_message(candles: DataFrame) -> str:
+    """Candles serialized once for every streaming client"""
+    return dumps(candles[STREAM_COLUMNS].to_dict(orient="records")).decode()
+
+
+class Subscription:
+    """One client's view of a (ticker, timeframe) channel"""
+
+    def __init__(self, key: tuple[str, str], maxsize: int):
+        self.key = key
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        self.lagged = False
+
+    def push(self, message: str):
+        """
+        Enqueue without ever blocking the publisher. A client that falls behind loses
+        its oldest pending messages and is flagged as lagged so it can resync.
+        """
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            self.lagged = True
+        self.queue.put_nowait(message)
+
+
+class CandleBroker:
+    """In-process fan-out of candle updates to streaming clients, keyed by (ticker, timeframe)"""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions: dict[tuple[str, str], set[Subscription]] = {}
+
+    @staticmethod
+    def _key(ticker: str, timeframe: str) -> tuple[str, str]:
+        return ticker.lower(), timeframe
+
+    def subscribe(self, ticker: str, timeframe: str) -> Subscription:
+        key = self._key(ticker, timeframe)
+        subscription = Subscription(key, self.queue_size)
+        self._subscriptions.setdefault(key, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.key)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.key]
+
+    def publish(self, ticker: str, timeframe: str, message: str) -> int:
+        """Fan an already-serialized message out to every subscriber; returns the number reached"""
+        subscriptions = self._subscriptions.get(self._key(ticker, timeframe), ())
+        for subscription in subscriptions:
+            subscription.push(message)
+        if subscriptions:
+            logger.debug(f"Published {ticker} {timeframe} update to {len(subscriptions)} subscriber(s)")
+        return len(subscriptions)
+
+    def has_subscribers(self, ticker: str, timeframe: str) -> bool:
+        return self._key(ticker, timeframe) in self._subscriptions
+
+    def subscriber_count(self) -> int:
+        return sum(len(s) for s in self._subscriptions.values())
+
+
+candle_broker = CandleBroker(STREAM_CLIENT_QUEUE_SIZE)
+
+
+class CandleRelay:
+    """
+    Fans candle updates out to the brokers of every worker process. Only the scheduler
+    leader syncs candles, so it publishes to its own broker and NOTIFYs a Postgres
+    channel that every worker LISTENs on over a dedicated connection (pooled connections
+    drop their listeners when released). An update too large for a NOTIFY payload is
+    sent as the timestamp it starts from, and workers with subscribers fetch it.
+    """
+
+    def __init__(self, broker: CandleBroker, channel: str, retry_seconds: float):
+        self.broker = broker
+        self.channel = channel
+        self.retry_seconds = retry_seconds
+        self.origin = secrets.token_hex(8)  # tells this process's own notifications apart
+        self._conn: asyncpg.Connection | None = None
+        self._task: asyncio.Task | None = None
+        self._fetches: set[asyncio.Task] = set()
+
+    async def start(self):
+        """Start listening in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def publish(self, ticker: str, timeframe: str, candles: DataFrame):
+        """Push upserted candles to this worker's clients and notify the other workers"""
+        message = candle_message(candles)
+        self.broker.publish(ticker, timeframe, message)
+
+        event = {"origin": self.origin, "ticker": ticker, "timeframe": timeframe}
+        payload = dumps({**event, "message": message}).decode()
+        if len(payload.encode()) >= NOTIFY_PAYLOAD_LIMIT:
+            payload = dumps({**event, "since": candles["timestamp"].min()}).decode()
+        try:
+            await db.notify(self.channel, payload)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to relay {ticker} {timeframe} candles to other workers: {e}")
+
+    async def _run(self):
+        while True:
+            try:
+                self._conn = await asyncpg.connect(DATABASE_URL)
+                await self._conn.add_listener(self.channel, self._on_notify)
+                logger.debug(f"Listening for candle updates on '{self.channel}'")
+                while True:
+                    # Keep-alive: a dead session would otherwise miss notifications silently
+                    await asyncio.sleep(self.retry_seconds)
+                    await self._conn.fetchval("SELECT 1", timeout=self.retry_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Candle relay connection failed: {e}")
+            finally:
+                await self._close_connection()
+            await asyncio.sleep(self.retry_seconds)
+
+    def _on_notify(self, conn, pid: int, channel: str, payload: str):
+        event = json.loads(payload)
+        if event["origin"] == self.origin or not self.broker.has_subscribers(event["ticker"], event["timeframe"]):
+            return
+        if "message" in event:
+            self.broker.publish(event["ticker"], event["timeframe"], event["message"])
+            return
+        task = asyncio.create_task(
+            self._relay_since(event["ticker"], event["timeframe"], datetime.fromisoformat(event["since"]))
+        )
+        self._fetches.add(task)
+        task.add_done_callback(self._fetches.discard)
+
+    async def _relay_since(self, ticker: str, timeframe: str, since: datetime):
+        try:
+            rows = await db.fetch_candles_since(ticker, timeframe, since)
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to fetch relayed {ticker} {timeframe} candles: {e}")
+            return
+        if rows:
+            self.broker.publish(ticker, timeframe, candle_message(DataFrame(rows)))
+
+    async def _close_connection(self):
+        if self._conn is not None:
+            try:
+                await self._conn.close(timeout=self.retry_seconds)
+            except Exception:
+                self._conn.terminate()
+            self._conn = None
+
+
+candle_relay = CandleRelay(candle_broker, STREAM_NOTIFY_CHANNEL, LEADER_POLL_SECONDS)
@@ -1,19 +1,109 @@
+import time
+import asyncio
+import functools
+from datetime import datetime, timezone
 from loguru import logger
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.events import (
+    EVENT_JOB_SUBMITTED, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+)
+
+# Upper bounds (seconds) of the run-duration histogram buckets
+JOB_DURATION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600)
+
+JOB_DEFAULTS = {
+    "coalesce": True,           # collapse a backlog of missed run times into one run
+    "max_instances": 1,         # never stack a run on top of one still in progress
+    "misfire_grace_time": 60,
+}
+
+
+class JobStats:
+    """Run statistics for a single scheduled job"""
+
+    def __init__(self):
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0        # fired while the previous run was still in progress
+        self.coalesced = 0      # extra run times merged into a single run
+        self.missed = 0         # run times dropped after the misfire grace time
+        self.running = False
+        self.last_started_at: datetime | None = None
+        self.last_success_at: datetime | None = None
+        self.last_failure_at: datetime | None = None
+        self.last_error: str | None = None
+        self.last_duration: float | None = None
+        self.newest_candle_at: datetime | None = None
+        self.duration_sum = 0.0
+        self.duration_counts = [0] * len(JOB_DURATION_BUCKETS)
+
+    def observe_duration(self, seconds: float):
+        self.runs += 1
+        self.last_duration = seconds
+        self.duration_sum += seconds
+        for i, upper in enumerate(JOB_DURATION_BUCKETS):
+            if seconds <= upper:
+                self.duration_counts[i] += 1
+                break
+
+    def duration_histogram(self) -> dict:
+        """Cumulative bucket counts, keyed by upper bound"""
+        histogram = {}
+        cumulative = 0
+        for upper, count in zip(JOB_DURATION_BUCKETS, self.duration_counts):
+            cumulative += count
+            histogram[str(upper)] = cumulative
+        histogram["+Inf"] = self.runs
+        return histogram
+
+    def data_lag_seconds(self) -> float | None:
+        if self.newest_candle_at is None:
+            return None
+        return (datetime.now(timezone.utc) - self.newest_candle_at).total_seconds()
+
+    def to_dict(self) -> dict:
+        return {
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "coalesced": self.coalesced,
+            "missed": self.missed,
+            "last_started_at": self.last_started_at.isoformat() if self.last_started_at else None,
+            "last_success_at": self.last_success_at.isoformat() if self.last_success_at else None,
+            "last_failure_at": self.last_failure_at.isoformat() if self.last_failure_at else None,
+            "last_error": self.last_error,
+            "last_duration_seconds": self.last_duration,
+            "newest_candle_at": self.newest_candle_at.isoformat() if self.newest_candle_at else None,
+            "data_lag_seconds": self.data_lag_seconds(),
+            "duration_seconds": {
+                "sum": self.duration_sum,
+                "count": self.runs,
+                "buckets": self.duration_histogram(),
+            },
+        }
 
 
 class SchedulerService:
     def __init__(self):
-        self.scheduler = AsyncIOScheduler()
+        self.scheduler = AsyncIOScheduler(job_defaults=JOB_DEFAULTS)
+        self.scheduler.add_listener(
+            self._on_job_event,
+            EVENT_JOB_SUBMITTED | EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED
+        )
         self.is_running = False
+        self.is_paused = False
+        self.job_stats: dict[str, JobStats] = {}
+        self._running: set[asyncio.Task] = set()
+        self._cancelled: set[asyncio.Task] = set()
         self._setup_jobs()
-    
+
     def _setup_jobs(self):
         """Configure all scheduled jobs"""
         from app.jobs.forex_jobs import sync_forex_data
-        
-        self.scheduler.add_job(
+
+        self.add_job(
             sync_forex_data,
             CronTrigger(minute="*/5"),
             kwargs={
@@ -22,7 +112,65 @@ class SchedulerService:
             },
             id="sync_xauusd"
         )
-    
+
+    def add_job(self, func, trigger, id: str, **kwargs):
+        """Register a job wrapped with run instrumentation"""
+        self.job_stats[id] = JobStats()
+        return self.scheduler.add_job(self._instrument(id, func), trigger, id=id, **kwargs)
+
+    def _instrument(self, job_id: str, func):
+        """
+        Wrap a coroutine job so that every run records its duration and outcome.
+        A job may return the timestamp of the newest candle it has seen, which is
+        used to report data lag.
+        """
+        stats = self.job_stats[job_id]
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            task = asyncio.current_task()
+            self._running.add(task)
+            stats.running = True
+            stats.last_started_at = datetime.now(timezone.utc)
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except asyncio.CancelledError:
+                if task not in self._cancelled:
+                    raise
+                # Stopped by cancel_running, not by the event loop shutting down
+                task.uncancel()
+                stats.last_error = "cancelled"
+                logger.warning(f"⚠️ Job {job_id} cancelled while running")
+            except Exception as e:
+                stats.failures += 1
+                stats.last_failure_at = datetime.now(timezone.utc)
+                stats.last_error = str(e)
+                logger.error(f"❌ Job {job_id} failed: {e}")
+            else:
+                stats.last_success_at = datetime.now(timezone.utc)
+                if isinstance(result, datetime):
+                    stats.newest_candle_at = result
+            finally:
+                stats.observe_duration(time.perf_counter() - start)
+                stats.running = False
+                self._running.discard(task)
+                self._cancelled.discard(task)
+
+        return wrapper
+
+    def _on_job_event(self, event):
+        stats = self.job_stats.get(event.job_id)
+        if stats is None:
+            return
+        if event.code == EVENT_JOB_SUBMITTED:
+            stats.coalesced += max(len(event.scheduled_run_times) - 1, 0)
+        elif event.code == EVENT_JOB_MAX_INSTANCES:
+            stats.skipped += 1
+            logger.warning(f"⚠️ Job {event.job_id} skipped: previous run still in progress")
+        elif event.code == EVENT_JOB_MISSED:
+            stats.missed += 1
+
     def start(self):
         """Start the scheduler"""
         if not self.is_running:
@@ -31,30 +179,54 @@ class SchedulerService:
             logger.info("✅ Scheduler started successfully")
         else:
             logger.warning("Scheduler is already running")
-    
+
+    def pause(self):
+        """Stop firing jobs without shutting the scheduler down"""
+        if self.is_running and not self.is_paused:
+            self.scheduler.pause()
+            self.is_paused = True
+            logger.info("⏸️ Scheduler paused")
+
+    def cancel_running(self) -> int:
+        """Cancel the job runs in progress; returns how many were cancelled"""
+        for task in self._running:
+            self._cancelled.add(task)
+            task.cancel()
+        return len(self._running)
+
+    def resume(self):
+        """Resume firing jobs after pause()"""
+        if self.is_running and self.is_paused:
+            self.scheduler.resume()
+            self.is_paused = False
+            logger.info("▶️ Scheduler resumed")
+
     def stop(self):
         """Stop the scheduler"""
         if self.is_running:
             self.scheduler.shutdown(wait=False)
             self.is_running = False
+            self.is_paused = False
             logger.info("✅ Scheduler stopped successfully")
         else:
             logger.warning("Scheduler is not running")
-    
+
     def get_jobs(self):
         """Get list of all scheduled jobs"""
         return self.scheduler.get_jobs()
-    
+
     def get_job_info(self):
         """Get formatted job information"""
         jobs = self.get_jobs()
         job_info = []
         for job in jobs:
+            stats = self.job_stats.get(job.id)
             job_info.append({
                 "id": job.id,
                 "name": job.name or job.func.__name__,
                 "next_run": job.next_run_time.isoformat() if job.next_run_time else None,
-                "trigger": str(job.trigger)
+                "trigger": str(job.trigger),
+                "stats": stats.to_dict() if stats else None,
             })
         return job_info
 
@@ -0,0 +1,235 @@
+import os
+import sys
+import atexit
+import secrets
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+import pandas as pd
+from loguru import logger
+from pandas import DataFrame
+from app.services.candle_cache import load_candles
+from app.services.indicators import load_indicator_columns, to_epoch_us
+
+# Arrays are laid out back to back in one block, each starting on a cache line
+ALIGNMENT = 64
+
+
+@dataclass(frozen=True)
+class SharedCandles:
+    """
+    Picklable handle to candles published in shared memory. Pass it to process pool
+    workers, which attach to the block by name instead of receiving a pickled DataFrame.
+
+    Columns: "timestamp" (int64 epoch microseconds, UTC), "trading_day" (int32 days
+    since 1970-01-01 of the trading date) and float64 prices and features.
+    """
+    name: str
+    ticker: str
+    timeframe: str
+    length: int
+    layout: tuple[tuple[str, str, int], ...]  # (column, dtype, byte offset)
+    size: int
+    publisher_pid: int
+
+    def attach(self) -> "AttachedCandles":
+        return attach(self)
+
+
+def _layout(columns: dict[str, np.dtype], length: int) -> tuple[tuple, int]:
+    layout, offset = [], 0
+    for name, dtype in columns.items():
+        layout.append((name, np.dtype(dtype).str, offset))
+        offset += -(-np.dtype(dtype).itemsize * length // ALIGNMENT) * ALIGNMENT
+    return tuple(layout), max(offset, 1)
+
+
+def _views(shm: shared_memory.SharedMemory, handle: SharedCandles, writeable: bool) -> dict[str, np.ndarray]:
+    arrays = {}
+    for name, dtype, offset in handle.layout:
+        array = np.ndarray(handle.length, dtype=dtype, buffer=shm.buf, offset=offset)
+        array.flags.writeable = writeable
+        arrays[name] = array
+    return arrays
+
+
+def candle_arrays(df: DataFrame) -> dict[str, np.ndarray]:
+    """Compact typed arrays of a candle DataFrame: every float column plus timestamps and day codes"""
+    arrays = {
+        "timestamp": to_epoch_us(df["timestamp"]),
+        "trading_day": (
+            pd.to_datetime(df["trading_date"]).to_numpy(dtype="datetime64[D]").astype("int64").astype("int32")
+        ),
+    }
+    for col in df.columns:
+        if col not in arrays and col != "trading_date" and pd.api.types.is_numeric_dtype(df[col]):
+            arrays[col] = df[col].to_numpy(dtype="float64")
+    return arrays
+
+
+class SharedCandleStore:
+    """
+    Candle arrays published into named shared memory blocks, reference counted per
+    (ticker, timeframe, range, columns, newest timestamp). Publishing the same data
+    again returns the existing block; the block is unlinked once every publisher has
+    released it, and at interpreter exit.
+    """
+
+    def __init__(self):
+        self._blocks: dict[tuple, list] = {}  # key -> [SharedMemory, SharedCandles, refs]
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def publish(self, ticker: str, timeframe: str, df: DataFrame, start=None, end=None) -> SharedCandles:
+        """Copy chronologically sorted candles (see candle_arrays) into shared memory once"""
+        arrays = candle_arrays(df)
+        newest = int(arrays["timestamp"][-1]) if len(df) else None
+        key = (ticker, timeframe, start, end, tuple(arrays), len(df), newest)
+
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                block[2] += 1
+                return block[1]
+
+            layout, size = _layout({name: a.dtype for name, a in arrays.items()}, len(df))
+            shm = shared_memory.SharedMemory(name=f"candles_{secrets.token_hex(8)}", create=True, size=size)
+            handle = SharedCandles(shm.name, ticker, timeframe, len(df), layout, size, os.getpid())
+            for name, view in _views(shm, handle, writeable=True).items():
+                view[:] = arrays[name]
+            self._blocks[key] = [shm, handle, 1]
+
+        logger.debug(f"Published {len(df)} candles for {ticker} | {timeframe} in {handle.name} ({size / 1e6:.1f} MB)")
+        return handle
+
+    def release(self, handle: SharedCandles):
+        """Drop one reference, unlinking the block after the last"""
+        with self._lock:
+            key = next((k for k, block in self._blocks.items() if block[1].name == handle.name), None)
+            if key is None:
+                return
+            block = self._blocks[key]
+            block[2] -= 1
+            if block[2] > 0:
+                return
+            del self._blocks[key]
+        block[0].close()
+        block[0].unlink()
+
+    def close(self):
+        """Unlink every published block; workers still attached keep their mapping until they detach"""
+        with self._lock:
+            blocks, self._blocks = list(self._blocks.values()), {}
+        for shm, _, _ in blocks:
+            shm.close()
+            shm.unlink()
+
+
+shared_candles = SharedCandleStore()
+
+
+async def publish_candles(
+    ticker: str,
+    timeframe: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    indicators: list[str] | None = None,
+) -> SharedCandles:
+    """
+    Publish a (ticker, timeframe) history, optionally cut to [start, end) after indicator
+    columns were computed over the full history. Release the handle when done.
+    """
+    df = await load_candles(ticker, timeframe)
+    df = await load_indicator_columns(ticker, timeframe, df, indicators or [])
+    if start is not None:
+        df = df[df["timestamp"] >= start]
+    if end is not None:
+        df = df[df["timestamp"] < end]
+    return shared_candles.publish(ticker, timeframe, df, start, end)
+
+
+class AttachedCandles:
+    """A worker's read-only, zero-copy view of published candles"""
+
+    def __init__(self, handle: SharedCandles):
+        self.handle = handle
+        self._shm = _open(handle)
+        self.arrays = _views(self._shm, handle, writeable=False)
+
+    def __len__(self) -> int:
+        return self.handle.length
+
+    def to_dataframe(self) -> DataFrame:
+        """
+        The candles as load_candles returns them, less the constant ticker and timeframe
+        columns, for the row-based strategies. Price and feature columns stay views of the
+        shared block. Timestamps are materialized tz-aware (pandas only wraps them zero-copy
+        as naive datetimes) and trading dates become a categorical over the covered days.
+        """
+        arrays = self.arrays
+        days = arrays["trading_day"]
+        first = int(days[0]) if len(days) else 0
+        last = int(days[-1]) if len(days) else -1
+        calendar = pd.Index(np.arange(first, last + 1).astype("datetime64[D]").astype(object))
+        columns = {
+            "timestamp": pd.to_datetime(arrays["timestamp"], unit="us", utc=True),
+            "trading_date": pd.Categorical.from_codes(days - first, categories=calendar),
+        }
+        columns.update({name: a for name, a in arrays.items() if name not in ("timestamp", "trading_day")})
+        return DataFrame(columns, copy=False)
+
+    def close(self):
+        """Unmap the block; fails with BufferError while DataFrames built from it are alive"""
+        self.arrays = {}
+        self._shm.close()
+
+    def __enter__(self) -> "AttachedCandles":
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self.close()
+        except BufferError:
+            # Views escaped the block; the mapping is released when they are collected
+            pass
+
+
+def _shares_tracker(handle: SharedCandles) -> bool:
+    """Processes the publisher starts through multiprocessing inherit its resource tracker"""
+    parent = multiprocessing.parent_process()
+    return os.getpid() == handle.publisher_pid or (parent is not None and parent.pid == handle.publisher_pid)
+
+
+def _open(handle: SharedCandles) -> shared_memory.SharedMemory:
+    """Attach to a block without leaving it to this process's resource tracker"""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=handle.name, track=False)
+    # Before Python 3.13 attaching registers the block for cleanup. A tracker of this
+    # process alone would unlink it (and warn about a leak) when the process exits, under
+    # the publisher's feet; the publisher's own tracker already holds it and must keep it.
+    shm = shared_memory.SharedMemory(name=handle.name)
+    if not _shares_tracker(handle):
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+# Attachments kept for the lifetime of a worker process, so tasks over the same
+# candles map the block once
+_attached: dict[str, AttachedCandles] = {}
+
+
+def attach(handle: SharedCandles) -> AttachedCandles:
+    """Attach to published candles, reusing this process's existing attachment"""
+    attached = _attached.get(handle.name)
+    if attached is None:
+        attached = _attached[handle.name] = AttachedCandles(handle)
+    return attached
+
+
+def detach(handle: SharedCandles):
+    attached = _attached.pop(handle.name, None)
+    if attached is not None:
+        attached.__exit__(None, None, None)
@@ -0,0 +1,56 @@
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Hashable
+from app.services.metrics import SINGLEFLIGHT_CALLS
+from app.services.profiling import collect_stages, add_stages
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one computation. The first caller
+    starts it as a task; callers arriving while it runs await the same task and get the
+    same result (or exception). Results are shared, so callers must not mutate them.
+
+    The task is shielded from its callers: a client disconnecting cancels only its own
+    wait, never the computation others are waiting on.
+
+    The computation runs in a copy of the first caller's context with its own stage
+    timings, which are added to the profile of every caller once it stops waiting.
+    """
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self._inflight: dict[Hashable, tuple[asyncio.Task, dict[str, float]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    def _done(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key, (None,))[0] is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Retrieved here so a failure nobody is left waiting for isn't logged as unhandled
+            task.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            context = contextvars.copy_context()
+            timings = context.run(collect_stages)
+            task = asyncio.get_running_loop().create_task(fn(), context=context)
+            self._inflight[key] = (task, timings)
+            task.add_done_callback(lambda t: self._done(key, t))
+            SINGLEFLIGHT_CALLS.labels(self.operation, "executed").inc()
+        else:
+            task, timings = inflight
+            SINGLEFLIGHT_CALLS.labels(self.operation, "coalesced").inc()
+        try:
+            return await asyncio.shield(task)
+        finally:
+            add_stages(timings)
+
+
+backtest_run_flights = SingleFlight("backtest_run")
+backtest_results_flights = SingleFlight("backtest_results")
+intraday_flights = SingleFlight("intraday")
+indicator_flights = SingleFlight("indicators")
@@ -1,9 +1,24 @@
 from datetime import datetime, date, timedelta, time
 from zoneinfo import ZoneInfo
-from pandas import DataFrame
+from pandas import DataFrame, Series, to_timedelta
 from typing import Optional, Iterable
 from loguru import logger
 
+TIMEFRAME_UNIT_SECONDS = {
+    "min": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+
+def timeframe_to_seconds(timeframe: str) -> int:
+    """Convert a Tiingo-style resample frequency (e.g. 5min, 1hour, 1day) to seconds"""
+    for unit, seconds in TIMEFRAME_UNIT_SECONDS.items():
+        if timeframe.endswith(unit) and timeframe[:-len(unit)].isdigit():
+            return int(timeframe[:-len(unit)]) * seconds
+    raise ValueError(f"Invalid timeframe: {timeframe}")
+
+
 def get_trading_date(utc_timestamp: datetime) -> date:
     """
     Simple trading date assignment:
@@ -16,6 +31,13 @@ def get_trading_date(utc_timestamp: datetime) -> date:
         return utc_timestamp.date()
 
 
+def get_trading_dates(utc_timestamps: Series) -> Series:
+    """Vectorized get_trading_date over a tz-aware timestamp Series"""
+    utc_timestamps = utc_timestamps.dt.tz_convert("UTC")
+    rollover = to_timedelta((utc_timestamps.dt.hour >= 22).astype("int64"), unit="D")
+    return (utc_timestamps.dt.normalize() + rollover).dt.date
+
+
 def add_prev_days_high_and_low(df: DataFrame) -> DataFrame:
     df = df.copy()
 
@@ -0,0 +1,123 @@
+import io
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from app.utils.date_utils import get_trading_dates
+
+REQUIRED_COLUMNS = ["ticker", "direction", "entry_price", "exit_price", "size", "type", "entry_time", "exit_time"]
+OPTIONAL_COLUMNS = ["trading_date", "notes", "stop_price"]
+PRICE_COLUMNS = ["entry_price", "exit_price", "size", "stop_price"]
+TRADE_TYPES = {"real", "simulated"}
+
+# Two rows describe the same fill when all of these match
+DEDUPE_COLUMNS = ["ticker", "type", "direction", "entry_time", "entry_price", "size"]
+
+
+def read_trade_file(content: bytes, fmt: str) -> DataFrame:
+    """Parse an uploaded CSV or JSON-lines file, leaving type conversion to validate_trades"""
+    if fmt == "csv":
+        df = pd.read_csv(io.BytesIO(content), dtype=str, keep_default_na=False, na_values=[""])
+    else:
+        df = pd.read_json(io.BytesIO(content), lines=True, dtype=False, convert_dates=False)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    return df
+
+
+def validate_trades(df: DataFrame) -> tuple[DataFrame, list[dict]]:
+    """
+    Validate and normalize imported trades column-wise.
+
+    Returns the valid rows (with a 1-based `source_row`, typed values and derived
+    trading dates) and one error per failed check, as {"row", "field", "message"}.
+    Rows with any error are left out.
+    """
+    missing = [c for c in REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+    n = len(df)
+    out = DataFrame({"source_row": np.arange(1, n + 1)}, index=df.index)
+    errors: list[tuple[np.ndarray, str, str]] = []
+
+    def column(name: str) -> pd.Series:
+        return df[name] if name in df.columns else pd.Series([None] * n, index=df.index, dtype=object)
+
+    def check(mask: pd.Series, field: str, message: str):
+        if mask.any():
+            errors.append((out["source_row"][mask].to_numpy(), field, message))
+
+    for name in REQUIRED_COLUMNS:
+        check(column(name).isna(), name, "is required")
+
+    for name in ("ticker", "direction", "type"):
+        out[name] = column(name).astype("string").str.strip().str.lower()
+    check(column("type").notna() & ~out["type"].isin(TRADE_TYPES), "type", "must be 'real' or 'simulated'")
+
+    for name in PRICE_COLUMNS:
+        raw = column(name)
+        out[name] = pd.to_numeric(raw, errors="coerce").astype("float64")
+        check(raw.notna() & out[name].isna(), name, "is not a number")
+    check(out["size"] <= 0, "size", "must be positive")
+
+    for name in ("entry_time", "exit_time"):
+        raw = column(name)
+        out[name] = pd.to_datetime(raw, utc=True, errors="coerce", format="ISO8601")
+        check(raw.notna() & out[name].isna(), name, "is not an ISO 8601 timestamp")
+    check(out["exit_time"] < out["entry_time"], "exit_time", "is before entry_time")
+
+    raw_dates = column("trading_date")
+    given_dates = pd.to_datetime(raw_dates, errors="coerce", format="ISO8601").dt.date
+    check(raw_dates.notna() & given_dates.isna(), "trading_date", "is not a date")
+    derived_dates = get_trading_dates(out["entry_time"].fillna(pd.Timestamp(0, tz="UTC")))
+    out["trading_date"] = np.where(raw_dates.notna(), given_dates, derived_dates)
+
+    out["notes"] = column("notes").astype(object).where(column("notes").notna(), None)
+
+    error_list = [
+        {"row": int(row), "field": field, "message": message}
+        for rows, field, message in errors
+        for row in rows
+    ]
+    failed = set(r["row"] for r in error_list)
+    valid = out[~out["source_row"].isin(failed)]
+    return valid, sorted(error_list, key=lambda e: e["row"])
+
+
+def drop_file_duplicates(valid: DataFrame) -> tuple[DataFrame, list[int]]:
+    """Keep the first of rows describing the same fill; returns the source rows of the others"""
+    duplicated = valid.duplicated(subset=DEDUPE_COLUMNS, keep="first")
+    return valid[~duplicated], valid.loc[duplicated, "source_row"].tolist()
+
+
+def to_records(valid: DataFrame) -> list[tuple]:
+    """Rows for db.import_trades, in TRADE_IMPORT_COLUMNS order"""
+    stop_price = valid["stop_price"].astype(object).where(valid["stop_price"].notna(), None)
+    return list(zip(
+        valid["source_row"].tolist(),
+        valid["ticker"].tolist(),
+        valid["direction"].tolist(),
+        valid["entry_price"].tolist(),
+        valid["exit_price"].tolist(),
+        valid["size"].tolist(),
+        valid["type"].tolist(),
+        valid["entry_time"].dt.to_pydatetime(),
+        valid["exit_time"].dt.to_pydatetime(),
+        valid["trading_date"].tolist(),
+        valid["notes"].tolist(),
+        stop_price.tolist(),
+    ))
+
+
+def prepare_import(content: bytes, fmt: str) -> tuple[int, list[tuple], list[int], list[dict]]:
+    """
+    Parse and validate an uploaded statement. Returns the number of data rows, the
+    records to import, the source rows repeated within the file and the row errors.
+    Raises ValueError when the file cannot be parsed or lacks required columns.
+    """
+    try:
+        df = read_trade_file(content, fmt)
+    except (ValueError, pd.errors.ParserError) as e:
+        raise ValueError(f"Could not parse {fmt} file: {e}")
+    valid, errors = validate_trades(df)
+    valid, duplicates = drop_file_duplicates(valid)
+    return len(df), to_records(valid), duplicates, errors
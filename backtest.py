@@ -0,0 +1,264 @@
+"""
+Run strategies over a local candle snapshot without the API or the database, for
+overnight research batches. Every (ticker, strategy, settings) combination runs across
+all cores; each ticker's candles are loaded once and shared with the workers through
+shared memory, and the runs on one ticker are evaluated in single passes over its bars.
+Besides the shared arrays, a worker only holds its own timestamp column and a few blocks
+of bars as Python objects (see BarRows), so memory stays flat as --workers grows.
+
+The snapshot is either a candle cache directory ({root}/{ticker}/{timeframe}/, as the
+API maintains under CANDLE_CACHE_DIR) or a single Parquet, Arrow or CSV dump of
+market_snapshot rows, e.g. from
+    psql -c "\\copy (SELECT * FROM market_snapshot WHERE timeframe = '5min') TO 'candles.csv' CSV HEADER"
+
+Writes to --out:
+    summary.{parquet,csv}   one row per run: settings, trade stats and timings
+    trades.{parquet,csv}    every trade, tagged with its run
+    equity.{parquet,csv}    the daily equity curve of every run
+
+Usage:
+    python backtest.py --snapshot data/candles --timeframe 5min --tickers xauusd,eurusd \\
+        --strategies previous_day_breakout --set take_profit=2,4,6 --set stop_loss=5,10 --out results/
+"""
+import os
+import json
+import time
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+import pandas as pd
+from loguru import logger
+from pandas import DataFrame
+from app.services.backtest import (
+    STRATEGY_MAP, BACKTEST_START, build_settings, run_backtests, daily_equity_curve
+)
+from app.services.candle_cache import ParquetCandleCache
+from app.services.indicators import parse_indicators, add_indicator_columns
+from app.services.shared_candles import SharedCandles, shared_candles, attach
+
+SNAPSHOT_READERS = {
+    ".parquet": pd.read_parquet,
+    ".arrow": pd.read_feather,
+    ".feather": pd.read_feather,
+    ".csv": lambda path: pd.read_csv(path, engine="pyarrow"),
+}
+
+
+def parse_value(value: str):
+    """Numbers and booleans as JSON, anything else (e.g. times) as the string pydantic parses"""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def parse_sweep(assignments: list[str]) -> dict[str, list]:
+    """["take_profit=2,4", "stop_loss=5"] -> {"take_profit": [2, 4], "stop_loss": [5]}"""
+    sweep = {}
+    for assignment in assignments:
+        name, sep, values = assignment.partition("=")
+        if not sep or not values:
+            raise ValueError(f'Expected name=value[,value...], got "{assignment}"')
+        sweep[name.strip()] = [parse_value(v.strip()) for v in values.split(",")]
+    return sweep
+
+
+def build_runs(strategies: list[str], sweep: dict[str, list]) -> list[tuple[str, str, dict]]:
+    """(label, strategy, overrides) for every strategy and combination of swept values"""
+    runs = []
+    for strategy in strategies:
+        for values in itertools.product(*sweep.values()):
+            overrides = dict(zip(sweep, values))
+            build_settings(strategy, overrides)  # fail before any work is scheduled
+            label = ",".join(f"{k}={v}" for k, v in overrides.items())
+            runs.append((f"{strategy}[{label}]" if label else strategy, strategy, overrides))
+    return runs
+
+
+def normalize_candles(df: DataFrame) -> DataFrame:
+    """Dump rows in chronological order with the types load_candles returns"""
+    df = df.copy()
+    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+    df["trading_date"] = pd.to_datetime(df["trading_date"]).dt.date
+    for col in df.columns:
+        if col not in ("ticker", "timeframe", "timestamp", "trading_date"):
+            df[col] = pd.to_numeric(df[col]).astype("float64")
+    return df.sort_values("timestamp").drop_duplicates(subset=["timestamp"], keep="last").reset_index(drop=True)
+
+
+def load_snapshot(path: str, timeframe: str, tickers: list[str] | None) -> dict[str, DataFrame]:
+    """Candles per ticker from a candle cache directory or a single dump file"""
+    if os.path.isdir(path):
+        cache = ParquetCandleCache(path)
+        names = tickers or sorted(
+            t for t in os.listdir(path) if os.path.isdir(os.path.join(path, t, timeframe))
+        )
+        candles = {}
+        for ticker in names:
+            df = cache.load(ticker.lower(), timeframe)
+            if df is None:
+                logger.warning(f"⚠️ No cached {timeframe} candles for {ticker} in {path}")
+                continue
+            candles[ticker] = df
+        return candles
+
+    suffix = os.path.splitext(path)[1].lower()
+    if suffix not in SNAPSHOT_READERS:
+        raise ValueError(f'Unsupported snapshot file "{path}" (expected {", ".join(SNAPSHOT_READERS)})')
+    dump = SNAPSHOT_READERS[suffix](path)
+    if "timeframe" in dump.columns:
+        dump = dump[dump["timeframe"] == timeframe]
+    if tickers:
+        dump = dump[dump["ticker"].str.lower().isin([t.lower() for t in tickers])]
+    return {ticker: normalize_candles(df) for ticker, df in dump.groupby("ticker", sort=True)}
+
+
+def run_task(handle: SharedCandles, runs: list[tuple[str, str, dict]]) -> list[tuple[dict, DataFrame, DataFrame]]:
+    """Worker: evaluate runs over published candles in one pass; (summary, trades, equity) per run"""
+    df = attach(handle).to_dataframe()
+    settings = [build_settings(strategy, overrides) for _, strategy, overrides in runs]
+
+    start = time.perf_counter()
+    run_trades = run_backtests(df, [(strategy, s) for (_, strategy, _), s in zip(runs, settings)])
+    elapsed = time.perf_counter() - start
+
+    results = []
+    for (label, strategy, overrides), s, trades in zip(runs, settings, run_trades):
+        run = {"run": label, "ticker": handle.ticker, "timeframe": handle.timeframe, "strategy": strategy}
+        equity = DataFrame(daily_equity_curve(trades, df, s, strategy)).drop(columns="strategy")
+        pnl = trades["pnl"] if not trades.empty else pd.Series(dtype="float64")
+        summary = {
+            **run,
+            **overrides,
+            "settings": json.dumps(s.strategy.model_dump(mode="json"), sort_keys=True),
+            "trades": len(trades),
+            "win_rate": float((pnl > 0).mean()) if len(pnl) else None,
+            "total_pnl": float(pnl.sum()),
+            "final_equity": float(s.account.starting_cash + pnl.sum()),
+            "max_drawdown": float(trades["max_drawdown"].iloc[-1]) if not trades.empty else 0.0,
+            "bars": len(df),
+            # Runs in one pass share its duration
+            "pass_runs": len(runs),
+            "pass_seconds": elapsed,
+        }
+        results.append((summary, trades.assign(**run), equity.assign(**run)))
+    return results
+
+
+def write_table(df: DataFrame, out: str, name: str, fmt: str):
+    path = os.path.join(out, f"{name}.{fmt}")
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    logger.info(f"Wrote {len(df)} rows to {path}")
+
+
+def main(
+    snapshot: str,
+    timeframe: str,
+    tickers: list[str] | None,
+    strategies: list[str],
+    sweep: dict[str, list],
+    indicators: list[str],
+    start: datetime,
+    end: datetime | None,
+    workers: int,
+    runs_per_task: int,
+    out: str,
+    fmt: str,
+):
+    runs = build_runs(strategies, sweep)
+    started = time.perf_counter()
+    candles = load_snapshot(snapshot, timeframe, tickers)
+    if not candles:
+        raise SystemExit(f"No {timeframe} candles found in {snapshot}")
+
+    handles = {}
+    for ticker, df in candles.items():
+        # Indicators are computed over the full history before it is cut to the backtest window
+        df = add_indicator_columns(ticker, timeframe, df, indicators)
+        df = df[df["timestamp"] >= start]
+        if end is not None:
+            df = df[df["timestamp"] < end]
+        if df.empty:
+            logger.warning(f"⚠️ No candles for {ticker} between {start} and {end}")
+            continue
+        handles[ticker] = shared_candles.publish(ticker, timeframe, df, start, end)
+    del candles
+    if not handles:
+        raise SystemExit(f"No {timeframe} candles found between {start} and {end}")
+    logger.info(
+        f"🔄 Running {len(runs)} run(s) over {len(handles)} ticker(s) on {workers} worker(s)"
+        f" | loaded in {time.perf_counter() - started:.1f}s"
+    )
+
+    summaries, trades, equity = [], [], []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for ticker, handle in handles.items():
+            for i in range(0, len(runs), runs_per_task):
+                futures[pool.submit(run_task, handle, runs[i:i + runs_per_task])] = ticker
+        remaining = {ticker: sum(1 for t in futures.values() if t == ticker) for ticker in handles}
+
+        for future in as_completed(futures):
+            ticker = futures[future]
+            for summary, run_trades, run_equity in future.result():
+                summaries.append(summary)
+                trades.append(run_trades)
+                equity.append(run_equity)
+            remaining[ticker] -= 1
+            if not remaining[ticker]:
+                shared_candles.release(handles[ticker])
+            logger.info(f"Finished {len(summaries)}/{len(runs) * len(handles)} runs")
+
+    os.makedirs(out, exist_ok=True)
+    order = ["ticker", "run"]
+    write_table(DataFrame(summaries).sort_values(order, ignore_index=True), out, "summary", fmt)
+    write_table(pd.concat(trades, ignore_index=True), out, "trades", fmt)
+    write_table(pd.concat(equity, ignore_index=True).sort_values(order, kind="stable", ignore_index=True), out, "equity", fmt)
+    logger.info(f"✅ Batch completed in {time.perf_counter() - started:.1f}s")
+
+
+def parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+
+
+def split(value: str) -> list[str]:
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshot", required=True, help="candle cache directory or Parquet / Arrow / CSV dump")
+    parser.add_argument("--timeframe", default="5min")
+    parser.add_argument("--tickers", type=split, help="comma-separated; all tickers in the snapshot by default")
+    parser.add_argument("--strategies", type=split, default=list(STRATEGY_MAP),
+                        help=f"comma-separated, from {', '.join(STRATEGY_MAP)}; all by default")
+    parser.add_argument("--set", dest="sweep", action="append", default=[], metavar="NAME=V1[,V2...]",
+                        help="StrategySettings override; repeat to sweep the cartesian product")
+    parser.add_argument("--indicators", type=split, default=[], help="e.g. ema50,atr14")
+    parser.add_argument("--start", type=parse_date, default=BACKTEST_START, help="ISO date, UTC")
+    parser.add_argument("--end", type=parse_date, help="ISO date, UTC, exclusive")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--runs-per-task", type=int, default=4,
+                        help="runs evaluated per pass over a ticker's bars")
+    parser.add_argument("--out", default="backtest_results")
+    parser.add_argument("--format", dest="fmt", choices=["parquet", "csv"], default="parquet")
+    args = parser.parse_args()
+
+    unknown = [s for s in args.strategies if s not in STRATEGY_MAP]
+    if unknown:
+        parser.error(f"Unknown strategies: {', '.join(unknown)}")
+    try:
+        sweep = parse_sweep(args.sweep)
+        indicators = parse_indicators(args.indicators)
+        build_runs(args.strategies, sweep)
+    except ValueError as e:
+        parser.error(str(e))
+
+    main(
+        args.snapshot, args.timeframe, args.tickers, args.strategies, sweep, indicators,
+        args.start, args.end, max(1, args.workers), max(1, args.runs_per_task), args.out, args.fmt,
+    )
@@ -0,0 +1,122 @@
+"""
+Benchmark the hot candle query with asyncpg's default NUMERIC codec (decimal.Decimal)
+against the float codec registered by DatabaseManager._init_connection.
+
+--offline skips the database and times only what happens after decoding: building the
+DataFrame from rows of Decimal vs float values and getting float64 price columns out of it.
+
+Usage:
+    python -m benchmarks.db_decode --ticker xauusd --timeframe 5min --limit 100000
+    python -m benchmarks.db_decode --offline --limit 100000
+"""
+import time
+import asyncio
+import argparse
+import statistics
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import asyncpg
+import numpy as np
+import pandas as pd
+from app.config import DATABASE_URL
+from app.db import DatabaseManager, RECENT_CANDLES_SQL, CANDLE_COLUMNS
+
+PRICE_COLUMNS = [c for c in CANDLE_COLUMNS if c not in ("ticker", "timeframe", "timestamp", "trading_date")]
+
+
+async def time_query(conn: asyncpg.Connection, args: tuple, repeat: int) -> dict:
+    await conn.fetch(RECENT_CANDLES_SQL, *args)  # warm the statement cache
+
+    fetch_times, frame_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = await conn.fetch(RECENT_CANDLES_SQL, *args)
+        fetched = time.perf_counter()
+        df = pd.DataFrame([dict(r) for r in rows])
+        fetch_times.append(fetched - start)
+        frame_times.append(time.perf_counter() - fetched)
+
+    return {
+        "rows": len(rows),
+        "fetch_ms": statistics.median(fetch_times) * 1000,
+        "frame_ms": statistics.median(frame_times) * 1000,
+        "close_dtype": str(df["close"].dtype) if len(df) else None,
+    }
+
+
+async def main(ticker: str, timeframe: str, limit: int, repeat: int):
+    args = (ticker, timeframe, limit)
+
+    conn = await asyncpg.connect(DATABASE_URL)
+    try:
+        before = await time_query(conn, args, repeat)
+    finally:
+        await conn.close()
+
+    conn = await asyncpg.connect(DATABASE_URL)
+    try:
+        await DatabaseManager._init_connection(conn)
+        after = await time_query(conn, args, repeat)
+    finally:
+        await conn.close()
+
+    for label, result in (("decimal", before), ("float", after)):
+        print(
+            f"{label:>8}: {result['rows']} rows | fetch+decode {result['fetch_ms']:.1f} ms"
+            f" | DataFrame build {result['frame_ms']:.1f} ms | close dtype {result['close_dtype']}"
+        )
+
+
+def synthetic_rows(limit: int, decimal: bool) -> list[dict]:
+    """Rows shaped like the hot query's, with numeric(12,5) prices as either codec returns them"""
+    rng = np.random.default_rng(0)
+    prices = np.round(2000 + np.cumsum(rng.normal(0, 1, (limit, len(PRICE_COLUMNS))), axis=0), 5)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for i, values in enumerate(prices.tolist()):
+        timestamp = start + timedelta(minutes=5 * i)
+        row = {"ticker": "xauusd", "timeframe": "5min", "timestamp": timestamp, "trading_date": timestamp.date()}
+        row.update(zip(PRICE_COLUMNS, (Decimal(f"{v:.5f}") if decimal else v for v in values)))
+        rows.append(row)
+    return rows
+
+
+def time_offline(limit: int, repeat: int, decimal: bool) -> dict:
+    rows = synthetic_rows(limit, decimal)
+    frame_times, float_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = pd.DataFrame(rows)
+        built = time.perf_counter()
+        df[PRICE_COLUMNS].astype("float64")
+        frame_times.append(built - start)
+        float_times.append(time.perf_counter() - built)
+    return {
+        "rows": len(rows),
+        "frame_ms": statistics.median(frame_times) * 1000,
+        "float_ms": statistics.median(float_times) * 1000,
+        "close_dtype": str(df["close"].dtype),
+    }
+
+
+def main_offline(limit: int, repeat: int):
+    for label, decimal in (("decimal", True), ("float", False)):
+        result = time_offline(limit, repeat, decimal)
+        print(
+            f"{label:>8}: {result['rows']} rows | DataFrame build {result['frame_ms']:.1f} ms"
+            f" | to float64 {result['float_ms']:.1f} ms | close dtype {result['close_dtype']}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticker", default="xauusd")
+    parser.add_argument("--timeframe", default="5min")
+    parser.add_argument("--limit", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--offline", action="store_true", help="time the post-decode work on synthetic rows")
+    opts = parser.parse_args()
+    if opts.offline:
+        main_offline(opts.limit, opts.repeat)
+    else:
+        asyncio.run(main(opts.ticker, opts.timeframe, opts.limit, opts.repeat))
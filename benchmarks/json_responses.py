@@ -0,0 +1,78 @@
+"""
+Benchmark request latency of a 10k-point equity curve served through FastAPI's default
+path (pydantic models + response_model + jsonable JSON encoder) against the
+FastJSONResponse path (pre-shaped dicts rendered with orjson, and the pre-rendered cached body).
+
+Usage:
+    python -m benchmarks.json_responses --points 10000 --requests 200
+"""
+import time
+import asyncio
+import argparse
+from datetime import date, timedelta
+import httpx
+import numpy as np
+from fastapi import FastAPI
+from app.schemas.backtest import BacktestResult
+from app.responses import FastJSONResponse, dumps
+from app.routes.backtest import result_payload
+
+
+def build_app(n_points: int) -> FastAPI:
+    start = date(2000, 1, 1)
+    rows = [
+        {"trading_date": start + timedelta(days=i), "equity": 10000 + i * 0.5, "pnl": 0.5}
+        for i in range(n_points)
+    ]
+    models = [BacktestResult(timestamp=r["trading_date"], equity=r["equity"], pnl=r["pnl"]) for r in rows]
+    payloads = [result_payload(r["trading_date"], r["equity"], r["pnl"]) for r in rows]
+    body = dumps(payloads)
+
+    app = FastAPI()
+
+    @app.get("/default", response_model=list[BacktestResult])
+    async def default():
+        return [BacktestResult(timestamp=r["trading_date"], equity=r["equity"], pnl=r["pnl"]) for r in rows]
+
+    @app.get("/default-cached-models", response_model=list[BacktestResult])
+    async def default_cached_models():
+        return models
+
+    @app.get("/fast")
+    async def fast():
+        return FastJSONResponse([result_payload(r["trading_date"], r["equity"], r["pnl"]) for r in rows])
+
+    @app.get("/fast-cached-body")
+    async def fast_cached_body():
+        return FastJSONResponse(body)
+
+    return app
+
+
+async def measure(client: httpx.AsyncClient, path: str, n_requests: int) -> np.ndarray:
+    await client.get(path)  # warm up
+    latencies = []
+    for _ in range(n_requests):
+        start = time.perf_counter()
+        response = await client.get(path)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+
+async def main(n_points: int, n_requests: int):
+    app = build_app(n_points)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{n_points} points, {n_requests} requests per path")
+        for path in ("/default", "/default-cached-models", "/fast", "/fast-cached-body"):
+            ms = await measure(client, path, n_requests)
+            print(f"{path:>24}: p50 {np.percentile(ms, 50):7.2f} ms | p99 {np.percentile(ms, 99):7.2f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=200)
+    opts = parser.parse_args()
+    asyncio.run(main(opts.points, opts.requests))
@@ -0,0 +1,137 @@
+-- migrate:up
+-- Rebuild market_snapshot as a table range-partitioned by month on timestamp.
+-- The primary key has to include the partition key, so the natural key
+-- (ticker, timeframe, timestamp) becomes the primary key and id is kept as a plain column.
+ALTER TABLE market_snapshot RENAME TO market_snapshot_unpartitioned;
+ALTER TABLE market_snapshot_unpartitioned RENAME CONSTRAINT market_snapshot_pkey TO market_snapshot_unpartitioned_pkey;
+ALTER TABLE market_snapshot_unpartitioned RENAME CONSTRAINT market_snapshot_ticker_timeframe_timestamp_key TO market_snapshot_unpartitioned_ticker_timeframe_timestamp_key;
+ALTER SEQUENCE market_snapshot_id_seq OWNED BY NONE;
+
+CREATE TABLE market_snapshot (
+    id BIGINT NOT NULL DEFAULT nextval('market_snapshot_id_seq'),
+    timestamp TIMESTAMPTZ NOT NULL,
+    ticker TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    open DECIMAL(12, 5) NOT NULL,
+    high DECIMAL(12, 5) NOT NULL,
+    low DECIMAL(12, 5) NOT NULL,
+    close DECIMAL(12, 5) NOT NULL,
+    volume BIGINT DEFAULT 0,
+
+    -- Derived / frequently used features
+    trading_date DATE NOT NULL,
+    ema20 DECIMAL(12, 5),
+    prev_day_high DECIMAL(12, 5),
+    prev_day_low DECIMAL(12, 5),
+    prev2_day_high DECIMAL(12, 5),
+    prev2_day_low DECIMAL(12, 5),
+
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+
+    CONSTRAINT market_snapshot_pkey PRIMARY KEY (ticker, timeframe, timestamp)
+) PARTITION BY RANGE (timestamp);
+
+-- Create the monthly partitions (UTC months) covering [start_ts, end_ts].
+-- Safe to call concurrently and repeatedly; returns the number of partitions created.
+CREATE OR REPLACE FUNCTION ensure_market_snapshot_partitions(start_ts TIMESTAMPTZ, end_ts TIMESTAMPTZ)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start TIMESTAMP := date_trunc('month', start_ts AT TIME ZONE 'UTC');
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    WHILE month_start <= end_ts AT TIME ZONE 'UTC' LOOP
+        partition_name := format('market_snapshot_%s', to_char(month_start, 'YYYY_MM'));
+        IF to_regclass(partition_name) IS NULL THEN
+            -- Only serialize callers when a partition actually has to be created
+            PERFORM pg_advisory_xact_lock(hashtext('ensure_market_snapshot_partitions'));
+        END IF;
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF market_snapshot FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                month_start AT TIME ZONE 'UTC',
+                (month_start + INTERVAL '1 month') AT TIME ZONE 'UTC'
+            );
+            created := created + 1;
+        END IF;
+        month_start := month_start + INTERVAL '1 month';
+    END LOOP;
+
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_market_snapshot_partitions(
+    COALESCE((SELECT MIN(timestamp) FROM market_snapshot_unpartitioned), NOW()),
+    GREATEST((SELECT MAX(timestamp) FROM market_snapshot_unpartitioned), NOW()) + INTERVAL '2 months'
+);
+
+INSERT INTO market_snapshot (
+    id, timestamp, ticker, timeframe, open, high, low, close, volume,
+    trading_date, ema20, prev_day_high, prev_day_low, prev2_day_high, prev2_day_low,
+    created_at, updated_at
+)
+SELECT
+    id, timestamp, ticker, timeframe, open, high, low, close, volume,
+    trading_date, ema20, prev_day_high, prev_day_low, prev2_day_high, prev2_day_low,
+    created_at, updated_at
+FROM market_snapshot_unpartitioned;
+
+DROP TABLE market_snapshot_unpartitioned;
+ALTER SEQUENCE market_snapshot_id_seq OWNED BY market_snapshot.id;
+
+-- /intraday/ lookups by trading day
+CREATE INDEX idx_market_snapshot_ticker_timeframe_trading_date
+    ON market_snapshot (ticker, timeframe, trading_date);
+
+-- Range scans over time; BRIN stays tiny because rows arrive in timestamp order
+CREATE INDEX idx_market_snapshot_timestamp_brin
+    ON market_snapshot USING BRIN (timestamp);
+
+CREATE TRIGGER trg_update_updated_at
+BEFORE UPDATE ON market_snapshot
+FOR EACH ROW
+EXECUTE FUNCTION update_updated_at_column();
+
+-- migrate:down
+ALTER TABLE market_snapshot RENAME TO market_snapshot_partitioned;
+ALTER TABLE market_snapshot_partitioned RENAME CONSTRAINT market_snapshot_pkey TO market_snapshot_partitioned_pkey;
+ALTER SEQUENCE market_snapshot_id_seq OWNED BY NONE;
+
+CREATE TABLE market_snapshot (
+    id BIGINT PRIMARY KEY DEFAULT nextval('market_snapshot_id_seq'),
+    timestamp TIMESTAMPTZ NOT NULL,
+    ticker TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    open DECIMAL(12, 5) NOT NULL,
+    high DECIMAL(12, 5) NOT NULL,
+    low DECIMAL(12, 5) NOT NULL,
+    close DECIMAL(12, 5) NOT NULL,
+    volume BIGINT DEFAULT 0,
+
+    -- Derived / frequently used features
+    trading_date DATE NOT NULL,
+    ema20 DECIMAL(12, 5),
+    prev_day_high DECIMAL(12, 5),
+    prev_day_low DECIMAL(12, 5),
+    prev2_day_high DECIMAL(12, 5),
+    prev2_day_low DECIMAL(12, 5),
+
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+
+    UNIQUE(ticker, timeframe, timestamp)
+);
+
+INSERT INTO market_snapshot SELECT * FROM market_snapshot_partitioned;
+
+DROP TABLE market_snapshot_partitioned CASCADE;
+DROP FUNCTION IF EXISTS ensure_market_snapshot_partitions;
+ALTER SEQUENCE market_snapshot_id_seq OWNED BY market_snapshot.id;
+
+CREATE TRIGGER trg_update_updated_at
+BEFORE UPDATE ON market_snapshot
+FOR EACH ROW
+EXECUTE FUNCTION update_updated_at_column();
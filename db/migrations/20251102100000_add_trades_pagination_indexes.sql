@@ -0,0 +1,17 @@
+-- migrate:up
+-- Keyset pagination on GET /trades/ orders by (created_at DESC, id DESC),
+-- optionally after equality filters on ticker and/or type.
+CREATE INDEX idx_trades_created_at_id ON trades (created_at DESC, id DESC);
+CREATE INDEX idx_trades_type_created_at_id ON trades (type, created_at DESC, id DESC);
+CREATE INDEX idx_trades_ticker_created_at_id ON trades (ticker, created_at DESC, id DESC);
+CREATE INDEX idx_trades_ticker_type_created_at_id ON trades (ticker, type, created_at DESC, id DESC);
+
+-- Covered by idx_trades_ticker_created_at_id
+DROP INDEX IF EXISTS idx_trades_ticker;
+
+-- migrate:down
+CREATE INDEX idx_trades_ticker ON trades (ticker);
+DROP INDEX IF EXISTS idx_trades_ticker_type_created_at_id;
+DROP INDEX IF EXISTS idx_trades_ticker_created_at_id;
+DROP INDEX IF EXISTS idx_trades_type_created_at_id;
+DROP INDEX IF EXISTS idx_trades_created_at_id;
@@ -0,0 +1,165 @@
+-- migrate:up
+-- Initial stop, so real and simulated trades can be compared in R multiples
+ALTER TABLE trades ADD COLUMN stop_price DECIMAL(12, 5);
+
+-- Per-day lookups of one ticker's trades, and matching real trades to simulated ones
+CREATE INDEX idx_trades_ticker_trading_date_type ON trades (ticker, trading_date, type);
+
+-- Per (trading_date, ticker, type) aggregates behind /analytics/trades.
+-- Points are signed price moves in the trade's direction, ignoring size.
+CREATE TABLE trade_daily_summary (
+    trading_date DATE NOT NULL,
+    ticker VARCHAR(20) NOT NULL,
+    type VARCHAR(20) NOT NULL,
+    trades INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    pnl DOUBLE PRECISION NOT NULL,
+    pnl_points DOUBLE PRECISION NOT NULL,
+    r_sum DOUBLE PRECISION NOT NULL,
+    r_count INTEGER NOT NULL,
+    -- Real trades only: entry price vs the nearest simulated entry, in points against the trade
+    entry_slippage_sum DOUBLE PRECISION NOT NULL,
+    entry_slippage_count INTEGER NOT NULL,
+    refreshed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (trading_date, ticker, type)
+);
+
+CREATE INDEX idx_trade_daily_summary_ticker_trading_date ON trade_daily_summary (ticker, trading_date);
+
+-- (trading_date, ticker) pairs whose summary rows are out of date
+CREATE TABLE trade_summary_dirty (
+    trading_date DATE NOT NULL,
+    ticker VARCHAR(20) NOT NULL,
+    PRIMARY KEY (trading_date, ticker)
+);
+
+CREATE OR REPLACE FUNCTION mark_trade_summary_dirty()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO trade_summary_dirty (trading_date, ticker)
+        SELECT DISTINCT trading_date, ticker FROM old_trades
+        ON CONFLICT DO NOTHING;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO trade_summary_dirty (trading_date, ticker)
+        SELECT DISTINCT trading_date, ticker FROM new_trades
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level, so bulk writes mark each (trading_date, ticker) once.
+-- Transition tables allow only one event per trigger.
+CREATE TRIGGER trg_trades_summary_dirty_insert
+AFTER INSERT ON trades
+REFERENCING NEW TABLE AS new_trades
+FOR EACH STATEMENT
+EXECUTE FUNCTION mark_trade_summary_dirty();
+
+CREATE TRIGGER trg_trades_summary_dirty_update
+AFTER UPDATE ON trades
+REFERENCING OLD TABLE AS old_trades NEW TABLE AS new_trades
+FOR EACH STATEMENT
+EXECUTE FUNCTION mark_trade_summary_dirty();
+
+CREATE TRIGGER trg_trades_summary_dirty_delete
+AFTER DELETE ON trades
+REFERENCING OLD TABLE AS old_trades
+FOR EACH STATEMENT
+EXECUTE FUNCTION mark_trade_summary_dirty();
+
+-- Recompute the summary rows of every dirty (trading_date, ticker).
+-- Returns the number of pairs refreshed; a no-op when nothing changed.
+CREATE OR REPLACE FUNCTION refresh_trade_daily_summary()
+RETURNS INTEGER AS $$
+DECLARE
+    dirty_dates DATE[];
+    dirty_tickers VARCHAR(20)[];
+BEGIN
+    -- Trades committed after the pairs are claimed re-mark them dirty for the next refresh
+    PERFORM pg_advisory_xact_lock(hashtext('refresh_trade_daily_summary'));
+
+    WITH claimed AS (
+        DELETE FROM trade_summary_dirty RETURNING trading_date, ticker
+    )
+    SELECT array_agg(trading_date), array_agg(ticker)
+    INTO dirty_dates, dirty_tickers
+    FROM claimed;
+
+    IF dirty_dates IS NULL THEN
+        RETURN 0;
+    END IF;
+
+    DELETE FROM trade_daily_summary s
+    USING unnest(dirty_dates, dirty_tickers) AS d(trading_date, ticker)
+    WHERE s.trading_date = d.trading_date AND s.ticker = d.ticker;
+
+    INSERT INTO trade_daily_summary (
+        trading_date, ticker, type, trades, wins, pnl, pnl_points,
+        r_sum, r_count, entry_slippage_sum, entry_slippage_count
+    )
+    SELECT
+        t.trading_date,
+        t.ticker,
+        t.type,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE t.points > 0),
+        COALESCE(SUM(t.points * t.size), 0),
+        COALESCE(SUM(t.points), 0),
+        COALESCE(SUM(t.points / t.risk) FILTER (WHERE t.risk > 0), 0),
+        COUNT(*) FILTER (WHERE t.risk > 0),
+        COALESCE(SUM(t.entry_slippage), 0),
+        COUNT(t.entry_slippage)
+    FROM (
+        SELECT
+            tr.trading_date,
+            tr.ticker,
+            tr.type,
+            tr.size,
+            (tr.exit_price - tr.entry_price)::float8 * sign.value AS points,
+            ABS(tr.entry_price - tr.stop_price)::float8 AS risk,
+            (tr.entry_price - sim.entry_price)::float8 * sign.value AS entry_slippage
+        FROM trades tr
+        JOIN unnest(dirty_dates, dirty_tickers) AS d(trading_date, ticker)
+            ON tr.trading_date = d.trading_date AND tr.ticker = d.ticker
+        CROSS JOIN LATERAL (
+            SELECT CASE WHEN LOWER(tr.direction) IN ('long', 'buy') THEN 1 ELSE -1 END AS value
+        ) sign
+        LEFT JOIN LATERAL (
+            SELECT s.entry_price
+            FROM trades s
+            WHERE tr.type = 'real'
+              AND s.type = 'simulated'
+              AND s.ticker = tr.ticker
+              AND s.trading_date = tr.trading_date
+              AND s.direction = tr.direction
+            ORDER BY ABS(EXTRACT(EPOCH FROM s.entry_time - tr.entry_time))
+            LIMIT 1
+        ) sim ON TRUE
+        WHERE tr.exit_price IS NOT NULL
+    ) t
+    GROUP BY t.trading_date, t.ticker, t.type;
+
+    RETURN array_length(dirty_dates, 1);
+END;
+$$ LANGUAGE plpgsql;
+
+-- Backfill from the existing journal
+INSERT INTO trade_summary_dirty (trading_date, ticker)
+SELECT DISTINCT trading_date, ticker FROM trades
+ON CONFLICT DO NOTHING;
+
+SELECT refresh_trade_daily_summary();
+
+-- migrate:down
+DROP TRIGGER IF EXISTS trg_trades_summary_dirty_delete ON trades;
+DROP TRIGGER IF EXISTS trg_trades_summary_dirty_update ON trades;
+DROP TRIGGER IF EXISTS trg_trades_summary_dirty_insert ON trades;
+DROP FUNCTION IF EXISTS refresh_trade_daily_summary;
+DROP FUNCTION IF EXISTS mark_trade_summary_dirty;
+DROP TABLE IF EXISTS trade_summary_dirty;
+DROP TABLE IF EXISTS trade_daily_summary;
+DROP INDEX IF EXISTS idx_trades_ticker_trading_date_type;
+ALTER TABLE trades DROP COLUMN IF EXISTS stop_price;
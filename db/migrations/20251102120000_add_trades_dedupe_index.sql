@@ -0,0 +1,6 @@
+-- migrate:up
+-- Duplicate checks of POST /trades/import look up existing fills by ticker and entry time
+CREATE INDEX idx_trades_ticker_entry_time ON trades (ticker, entry_time);
+
+-- migrate:down
+DROP INDEX IF EXISTS idx_trades_ticker_entry_time;
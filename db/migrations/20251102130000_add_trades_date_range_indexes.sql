@@ -0,0 +1,10 @@
+-- migrate:up
+-- GET /trades/ with a trading_date range pages by (trading_date DESC, created_at DESC, id DESC),
+-- so the range bounds and the keyset are one index range scan. Type and direction are
+-- low-cardinality residual filters on these scans.
+CREATE INDEX idx_trades_trading_date_created_at_id ON trades (trading_date DESC, created_at DESC, id DESC);
+CREATE INDEX idx_trades_ticker_trading_date_created_at_id ON trades (ticker, trading_date DESC, created_at DESC, id DESC);
+
+-- migrate:down
+DROP INDEX IF EXISTS idx_trades_ticker_trading_date_created_at_id;
+DROP INDEX IF EXISTS idx_trades_trading_date_created_at_id;
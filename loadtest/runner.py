@@ -0,0 +1,195 @@
+"""
+Drive the FastAPI app in-process with mixed /intraday/, /trades/ and /backtest/results/
+traffic and report throughput, latency percentiles and DB pool wait per endpoint.
+
+The app runs with its real lifespan (DB pool, scheduler leader election), so point
+DATABASE_URL at a database seeded with `python -m loadtest.seed`.
+
+Usage:
+    python -m loadtest.runner --duration 60 --concurrency 32
+    python -m loadtest.runner --mix intraday=5,trades=3,backtest_results=2 --json report.json
+
+Latencies are measured through httpx's ASGI transport, so they include request
+serialization on the client side but no network or server framing.
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+import httpx
+import numpy as np
+from app.main import app
+from app.db import db
+from app.services.backtest import STRATEGY_MAP
+from app.services.profiling import collect_stages, add_stages
+
+DEFAULT_MIX = "intraday=5,trades=3,backtest_results=2"
+
+# Stage under which pool acquisition time is collected, so that SingleFlight reports the
+# waits of a coalesced computation to every request that awaited it
+POOL_WAIT_STAGE = "pool_wait"
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    pool_waits: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, duration: float) -> dict:
+        ms = np.array(self.latencies) * 1000
+        wait_ms = np.array(self.pool_waits) * 1000
+        if not len(ms):
+            return {"requests": 0, "errors": self.errors}
+        return {
+            "requests": len(ms),
+            "errors": self.errors,
+            "rps": len(ms) / duration,
+            "p50_ms": float(np.percentile(ms, 50)),
+            "p95_ms": float(np.percentile(ms, 95)),
+            "p99_ms": float(np.percentile(ms, 99)),
+            "pool_wait_mean_ms": float(wait_ms.mean()),
+            "pool_wait_p99_ms": float(np.percentile(wait_ms, 99)),
+        }
+
+
+def instrument_pool_wait():
+    """Attribute pool acquisition time to the request(s) that waited for it"""
+    acquire = db.acquire
+
+    @asynccontextmanager
+    async def timed_acquire():
+        start = time.perf_counter()
+        async with acquire() as conn:
+            add_stages({POOL_WAIT_STAGE: (time.perf_counter() - start) * 1000})
+            yield conn
+
+    db.acquire = timed_acquire
+
+
+class Workload:
+    """Request generators over the data that is actually in the database"""
+
+    def __init__(self, ticker_dates: dict[str, list], timeframe: str):
+        self.ticker_dates = ticker_dates
+        self.tickers = list(ticker_dates)
+        self.timeframe = timeframe
+
+    @classmethod
+    async def discover(cls, timeframe: str) -> "Workload":
+        async with db.acquire() as conn:
+            rows = await conn.fetch(
+                "SELECT DISTINCT ticker, trading_date FROM market_snapshot WHERE timeframe = $1", timeframe
+            )
+        ticker_dates = {}
+        for r in rows:
+            ticker_dates.setdefault(r["ticker"], []).append(r["trading_date"])
+        if not ticker_dates:
+            raise SystemExit(f"No {timeframe} candles found, run `python -m loadtest.seed` first")
+        return cls(ticker_dates, timeframe)
+
+    # Each generator returns httpx.AsyncClient.build_request() arguments
+
+    def intraday(self) -> dict:
+        ticker = random.choice(self.tickers)
+        # Skew towards recent days, like dashboard users do
+        dates = sorted(self.ticker_dates[ticker])
+        trading_date = dates[-1 - min(int(random.expovariate(0.1)), len(dates) - 1)]
+        return {"method": "POST", "url": "/intraday/", "json": {
+            "ticker": ticker, "timeframe": self.timeframe, "trading_date": trading_date.isoformat()
+        }}
+
+    def trades(self) -> dict:
+        params = {"limit": random.choice([50, 100, 500])}
+        if random.random() < 0.5:
+            params["ticker"] = random.choice(self.tickers)
+        if random.random() < 0.3:
+            params["type"] = random.choice(["real", "simulated"])
+        return {"method": "GET", "url": "/trades/", "params": params}
+
+    def backtest_results(self) -> dict:
+        params = {
+            "strategy": random.choice(list(STRATEGY_MAP)),
+            "ticker": random.choice(self.tickers),
+            "timeframe": self.timeframe,
+        }
+        if random.random() < 0.5:
+            params["points"] = 1000
+        return {"method": "GET", "url": "/backtest/results/", "params": params}
+
+
+async def worker(client: httpx.AsyncClient, workload: Workload, mix: dict[str, int],
+                 stats: dict[str, EndpointStats], deadline: float):
+    endpoints, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        endpoint = random.choices(endpoints, weights)[0]
+        request = client.build_request(**getattr(workload, endpoint)())
+        timings = collect_stages()
+        start = time.perf_counter()
+        try:
+            response = await client.send(request)
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - start
+
+        if ok:
+            stats[endpoint].latencies.append(elapsed)
+            stats[endpoint].pool_waits.append(timings.get(POOL_WAIT_STAGE, 0.0) / 1000)
+        else:
+            stats[endpoint].errors += 1
+
+
+async def main(duration: float, concurrency: int, mix: dict[str, int], timeframe: str, json_path: str | None):
+    instrument_pool_wait()
+    async with app.router.lifespan_context(app):
+        workload = await Workload.discover(timeframe)
+        stats = {endpoint: EndpointStats() for endpoint in mix}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+            print(f"{concurrency} workers for {duration:.0f}s over {', '.join(workload.tickers)} | mix {mix}")
+            started = time.perf_counter()
+            deadline = started + duration
+            await asyncio.gather(*(worker(client, workload, mix, stats, deadline) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+    report = {endpoint: s.summary(elapsed) for endpoint, s in stats.items()}
+    print(f"{'endpoint':>18} {'reqs':>7} {'errs':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'wait':>8} {'wait99':>8}")
+    for endpoint, r in report.items():
+        if not r["requests"]:
+            print(f"{endpoint:>18} {0:>7} {r['errors']:>5}")
+            continue
+        print(
+            f"{endpoint:>18} {r['requests']:>7} {r['errors']:>5} {r['rps']:>8.1f} "
+            f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} "
+            f"{r['pool_wait_mean_ms']:>8.2f} {r['pool_wait_p99_ms']:>8.2f}"
+        )
+    print("latency / pool wait in ms")
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump({"duration": elapsed, "concurrency": concurrency, "mix": mix, "endpoints": report}, f, indent=2)
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        endpoint, _, weight = part.partition("=")
+        if not hasattr(Workload, endpoint.strip()):
+            raise argparse.ArgumentTypeError(f"Unknown endpoint '{endpoint}'")
+        mix[endpoint.strip()] = int(weight or 1)
+    return mix
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help="endpoint=weight,...")
+    parser.add_argument("--timeframe", default="5min")
+    parser.add_argument("--json", dest="json_path", help="Also write the report as JSON")
+    opts = parser.parse_args()
+    asyncio.run(main(opts.duration, opts.concurrency, opts.mix, opts.timeframe, opts.json_path))
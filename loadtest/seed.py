@@ -0,0 +1,148 @@
+"""
+Seed a local Postgres with synthetic market_snapshot, trades and backtest_results data
+for load testing. Schema migrations must already be applied (dbmate up).
+
+Usage:
+    python -m loadtest.seed --tickers xauusd,eurusd --days 730 --trades 50000
+    python -m loadtest.seed --replace --days 3650        # wipe previously seeded tickers first
+
+Refuses to touch a database that is not on localhost unless --allow-remote is given.
+"""
+import time
+import asyncio
+import argparse
+from urllib.parse import urlparse
+import asyncpg
+import numpy as np
+import pandas as pd
+from app.config import DATABASE_URL
+from app.db import CANDLE_COLUMNS
+from app.services.backtest import STRATEGY_MAP
+from app.utils.date_utils import process_candles
+
+TIMEFRAME = "5min"
+BAR_SECONDS = 300
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", ""}
+TRADE_COLUMNS = [
+    "ticker", "direction", "entry_price", "exit_price", "size", "type",
+    "entry_time", "exit_time", "trading_date", "notes", "created_at"
+]
+BACKTEST_RESULT_COLUMNS = ["ticker", "timeframe", "trading_date", "equity", "pnl", "strategy"]
+
+
+def generate_candles(ticker: str, days: int, rng: np.random.Generator) -> pd.DataFrame:
+    """Random-walk 5min candles for the last `days` calendar days, weekends excluded"""
+    end = pd.Timestamp.now(tz="UTC").floor("D")
+    timestamps = pd.date_range(end - pd.Timedelta(days=days), end, freq=f"{BAR_SECONDS}s", inclusive="left")
+    timestamps = timestamps[timestamps.dayofweek < 5]
+
+    n = len(timestamps)
+    start_price = rng.uniform(1, 2000)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.0008, n)))
+    open_ = np.concatenate([[start_price], close[:-1]])
+    wick = np.abs(rng.normal(0, 0.0005, (2, n))) * close
+    df = pd.DataFrame({
+        "ticker": ticker,
+        "timestamp": timestamps,
+        "open": open_,
+        "high": np.maximum(open_, close) + wick[0],
+        "low": np.minimum(open_, close) - wick[1],
+        "close": close,
+    })
+    return process_candles(df, TIMEFRAME)
+
+
+def generate_trades(candles: pd.DataFrame, n_trades: int, rng: np.random.Generator) -> list[tuple]:
+    """Real and simulated trades on random bars, created over the span of the candles"""
+    idx = rng.integers(0, len(candles) - 12, n_trades)
+    hold = rng.integers(1, 12, n_trades)
+    entries = candles.iloc[idx]
+    exits = candles.iloc[idx + hold]
+    direction = rng.choice(["long", "short"], n_trades)
+    trade_type = rng.choice(["real", "simulated"], n_trades, p=[0.3, 0.7])
+    size = rng.choice([0.01, 0.05, 0.1, 0.5, 1.0], n_trades)
+    created_at = exits["timestamp"] + pd.to_timedelta(rng.integers(0, 3600, n_trades), unit="s")
+
+    return list(zip(
+        entries["ticker"],
+        direction,
+        entries["open"].round(5),
+        exits["close"].round(5),
+        size,
+        trade_type,
+        entries["timestamp"].dt.to_pydatetime(),
+        exits["timestamp"].dt.to_pydatetime(),
+        entries["trading_date"],
+        [None] * n_trades,
+        created_at.dt.to_pydatetime(),
+    ))
+
+
+def generate_backtest_results(ticker: str, candles: pd.DataFrame, rng: np.random.Generator) -> list[tuple]:
+    """One daily equity curve per registered strategy"""
+    trading_dates = sorted(candles["trading_date"].unique())
+    rows = []
+    for strategy in STRATEGY_MAP:
+        pnl = rng.normal(5, 150, len(trading_dates)).round(2)
+        equity = 10000 + np.cumsum(pnl)
+        rows.extend(
+            (ticker, TIMEFRAME, d, float(e), float(p), strategy)
+            for d, e, p in zip(trading_dates, equity, pnl)
+        )
+    return rows
+
+
+async def seed(tickers: list[str], days: int, n_trades: int, replace: bool, seed_value: int):
+    rng = np.random.default_rng(seed_value)
+    conn = await asyncpg.connect(DATABASE_URL)
+    try:
+        if replace:
+            async with conn.transaction():
+                for table in ("market_snapshot", "trades", "backtest_results"):
+                    await conn.execute(f"DELETE FROM {table} WHERE ticker = ANY($1)", tickers)
+            print(f"Deleted existing rows for {', '.join(tickers)}")
+
+        for ticker in tickers:
+            start = time.perf_counter()
+            candles = generate_candles(ticker, days, rng)
+            trades = generate_trades(candles, n_trades // len(tickers), rng)
+            results = generate_backtest_results(ticker, candles, rng)
+
+            candle_records = list(candles[CANDLE_COLUMNS].itertuples(index=False, name=None))
+            async with conn.transaction():
+                await conn.fetchval(
+                    "SELECT ensure_market_snapshot_partitions($1, $2)",
+                    candles["timestamp"].min().to_pydatetime(),
+                    candles["timestamp"].max().to_pydatetime(),
+                )
+                await conn.copy_records_to_table("market_snapshot", records=candle_records, columns=CANDLE_COLUMNS)
+                await conn.copy_records_to_table("trades", records=trades, columns=TRADE_COLUMNS)
+                await conn.copy_records_to_table(
+                    "backtest_results", records=results, columns=BACKTEST_RESULT_COLUMNS
+                )
+            print(
+                f"{ticker}: {len(candle_records)} candles, {len(trades)} trades, "
+                f"{len(results)} backtest results in {time.perf_counter() - start:.1f}s"
+            )
+
+        await conn.execute("ANALYZE market_snapshot; ANALYZE trades; ANALYZE backtest_results")
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", default="xauusd", help="Comma-separated tickers")
+    parser.add_argument("--days", type=int, default=730, help="Calendar days of 5min candles per ticker")
+    parser.add_argument("--trades", type=int, default=20000, help="Total trades across all tickers")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--replace", action="store_true", help="Delete existing rows for the tickers first")
+    parser.add_argument("--allow-remote", action="store_true", help="Allow seeding a non-local database")
+    opts = parser.parse_args()
+
+    host = urlparse(DATABASE_URL or "").hostname or ""
+    if host not in LOCAL_HOSTS and not opts.allow_remote:
+        parser.error(f"DATABASE_URL points at '{host}', not a local database (pass --allow-remote to override)")
+
+    tickers = [t.strip().lower() for t in opts.tickers.split(",") if t.strip()]
+    asyncio.run(seed(tickers, opts.days, opts.trades, opts.replace, opts.seed))